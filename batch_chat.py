@@ -0,0 +1,260 @@
+# batch_chat.py
+
+"""
+Batch mode for CryptoBuddy: replay a JSONL file of queries through chatbot_response.
+
+Reads one query per line from a file (or stdin) and writes one JSON reply per
+line, in input order:
+
+  in:  {"id": "q1", "query": "Which crypto is trending up?"}     (or "message",
+       or just a JSON string)
+  out: {"line": 1, "id": "q1", "query": "...", "intent": "trend",
+        "reply": "...", "elapsed_ms": 0.41, "deduped": false}
+
+  - Streaming: at most --window chunks of --chunk-size queries are in flight,
+    so memory stays constant however long the input is.
+  - Duplicates (same text, up to whitespace) are answered once; the last
+    --dedupe-size distinct answers are remembered.
+  - The whole batch shares ONE market snapshot, taken when the batch starts
+    (from the on-disk snapshot if recent, see snapshot_store.py) and handed
+    to every worker process, so replies are consistent and workers never
+    call CoinGecko.
+  - --workers N spreads chunks over N processes (0 = answer in this process;
+    with mostly repeated questions the reply cache makes that the faster option).
+
+  python batch_chat.py queries.jsonl -o replies.jsonl --workers 4
+  cat queries.jsonl | python batch_chat.py > replies.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import smart_crypto
+from market_snapshot import SnapshotRefresher
+
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_WINDOW = 4            # chunks in flight per worker
+DEFAULT_DEDUPE_SIZE = 100_000
+
+
+# ------------------------------------------------------------------------------
+#                                WORKER SIDE
+# ------------------------------------------------------------------------------
+
+def init_worker(snapshot):
+    """Serve every query of this process from the batch’s snapshot."""
+    smart_crypto.market_refresher = SnapshotRefresher.frozen(snapshot)
+    smart_crypto.load_nlp()   # so the first query’s elapsed_ms isn’t the NLTK load
+
+
+def answer_chunk(texts):
+    """[(intent, reply, elapsed_ms)] for each query text."""
+    results = []
+    for text in texts:
+        start = time.perf_counter()
+        try:
+            intent, reply = smart_crypto.answer_query(text)
+        except Exception as e:
+            intent, reply = "error", f"{type(e).__name__}: {e}"
+        results.append((intent, reply, round((time.perf_counter() - start) * 1000, 3)))
+    return results
+
+
+class InlineExecutor:
+    """Executor-shaped stand-in that runs each chunk immediately (--workers 0)."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+# ------------------------------------------------------------------------------
+#                                STREAMING
+# ------------------------------------------------------------------------------
+
+def parse_line(line: str):
+    """(id, query text) from one input line; raises ValueError if unusable."""
+    value = json.loads(line)
+    if isinstance(value, str):
+        return None, value
+    if isinstance(value, dict):
+        query = value.get("query", value.get("message"))
+        if isinstance(query, str):
+            return value.get("id"), query
+    raise ValueError('expected a JSON string or an object with a "query" field')
+
+
+class BatchRunner:
+    """
+    Streams records through `executor` in input order.
+
+      runner = BatchRunner(executor, out=sys.stdout)
+      runner.run(open("queries.jsonl"))
+      runner.stats()
+    """
+
+    def __init__(self, executor, out, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 window: int = DEFAULT_WINDOW, dedupe_size: int = DEFAULT_DEDUPE_SIZE):
+        self.executor = executor
+        self.out = out
+        self.chunk_size = chunk_size
+        self.window = window
+        self.dedupe_size = dedupe_size
+        self._answered = OrderedDict()   # text -> (intent, reply, elapsed_ms), LRU
+        self._in_flight = {}             # text -> (future, index in its chunk)
+        self._pending = deque()          # chunks submitted, not yet written
+        self.lines = 0
+        self.unique = 0
+        self.errors = 0
+
+    def run(self, lines):
+        chunk = []
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            chunk.append((line_no, line))
+            if len(chunk) >= self.chunk_size:
+                self._submit(chunk)
+                chunk = []
+        if chunk:
+            self._submit(chunk)
+        while self._pending:
+            self._write(self._pending.popleft())
+
+    def _submit(self, chunk):
+        # Each record keeps what its answer comes from – the cached answer, or
+        # the future of the chunk computing it – so evicting a text from the
+        # dedupe LRU while the record is pending can’t lose its answer.
+        records = []
+        new_texts = {}      # text -> index in this chunk’s task
+        for line_no, line in chunk:
+            self.lines += 1
+            try:
+                query_id, query = parse_line(line)
+            except ValueError as e:
+                records.append((line_no, None, None, None, None, None, f"bad input line: {e}"))
+                continue
+            text = " ".join(query.split())
+            cached = self._answered.get(text)
+            pending = None
+            if cached is not None:
+                self._answered.move_to_end(text)
+            else:
+                pending = self._in_flight.get(text)
+                if pending is None and text not in new_texts:
+                    new_texts[text] = len(new_texts)
+            records.append((line_no, query_id, query, text, cached, pending, None))
+        if new_texts:
+            future = self.executor.submit(answer_chunk, list(new_texts))
+            for text, index in new_texts.items():
+                self._in_flight[text] = (future, index)
+            self.unique += len(new_texts)
+        self._pending.append(records)
+        while len(self._pending) > self.window:
+            self._write(self._pending.popleft())
+
+    def _write(self, records):
+        answered_here = {}
+        for line_no, query_id, query, text, cached, pending, error in records:
+            if error is not None:
+                self.errors += 1
+                self._emit({"line": line_no, "error": error})
+                continue
+            deduped = True
+            if cached is not None:
+                result = cached
+            elif pending is not None:
+                future, index = pending
+                result = future.result()[index]
+            elif text in answered_here:
+                result = answered_here[text]
+            else:
+                # First occurrence of a text this chunk computed
+                future, index = self._in_flight.pop(text)
+                result = answered_here[text] = future.result()[index]
+                self._remember(text, result)
+                deduped = False
+            intent, reply, elapsed_ms = result
+            if intent == "error":
+                self.errors += 1
+            row = {"line": line_no}
+            if query_id is not None:
+                row["id"] = query_id
+            row.update(query=query, intent=intent, reply=reply,
+                       elapsed_ms=elapsed_ms, deduped=deduped)
+            self._emit(row)
+
+    def _remember(self, text, result):
+        self._answered[text] = result
+        if len(self._answered) > self.dedupe_size:
+            self._answered.popitem(last=False)
+
+    def _emit(self, row):
+        self.out.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def stats(self):
+        return {"lines": self.lines, "unique_queries": self.unique, "errors": self.errors}
+
+
+# ------------------------------------------------------------------------------
+#                                    CLI
+# ------------------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of queries with CryptoBuddy")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (0 = answer in this process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--window", type=int, default=None,
+                        help=f"chunks in flight (default: {DEFAULT_WINDOW} per worker)")
+    parser.add_argument("--dedupe-size", type=int, default=DEFAULT_DEDUPE_SIZE)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    # Not get_market_snapshot(): a stale snapshot would start the background
+    # refresher, and the batch keeps the one it starts with anyway
+    snapshot = smart_crypto.market_refresher.get_or_refresh()
+    if snapshot is None:
+        print("Warning: no market data available; market questions will say so.",
+              file=sys.stderr)
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                       initargs=(snapshot,))
+    else:
+        init_worker(snapshot)
+        executor = InlineExecutor()
+    window = args.window or DEFAULT_WINDOW * max(1, args.workers)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    runner = BatchRunner(executor, sink, chunk_size=args.chunk_size, window=window,
+                         dedupe_size=args.dedupe_size)
+    try:
+        runner.run(source)
+    finally:
+        executor.shutdown(wait=True)
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    summary = dict(runner.stats(), elapsed_s=round(elapsed, 3),
+                   queries_per_s=round(runner.lines / elapsed, 1) if elapsed else None,
+                   snapshot_version=snapshot.version if snapshot else None)
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if runner.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
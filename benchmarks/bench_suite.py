@@ -0,0 +1,220 @@
+# benchmarks/bench_suite.py
+
+"""
+End-to-end benchmark: chatbot_response of smart_crypto.py and crypto_advisor.py
+against a local CoinGecko stand-in.
+
+Starts a FakeCoinGecko (fake_coingecko.py) with the given latency, error rate
+and universe size, then runs each target in a fresh subprocess (so imports,
+caches and memory start cold) pointed at it. smart_crypto tracks the whole
+universe through a generated coin catalog. Each target answers the same
+seeded query mix (trend / sustainability / compare of random coin pairs /
+list / help / small talk) from --threads threads and the report is printed as
+JSON:
+
+  throughput_qps, latency_ms {p50, p95, p99, max, mean}, first_response_ms,
+  import_ms, upstream_requests (as counted by the fake server), peak_rss_mb
+  and, with --tracemalloc, the peak of Python allocations (slower run).
+
+  python benchmarks/bench_suite.py --queries 5000 --universe 1000 --latency 0.02 \\
+      --error-rate 0.05 --output bench.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_coingecko import REAL_COIN_IDS, FakeCoinGecko, universe_ids  # noqa: E402
+from load_test import percentile  # noqa: E402
+
+TARGETS = ("smart_crypto", "crypto_advisor")
+
+# (kind, weight, query templates); {a} / {b} are replaced by coin names
+INTENT_MIX = [
+    ("trend", 30, ["Which crypto is trending up?", "Which coin is best for long-term profit?",
+                   "what's trending today"]),
+    ("sustainability", 20, ["What’s the most sustainable coin?", "Which coin is eco-friendly?",
+                            "most green crypto"]),
+    ("compare", 25, ["Compare {a} vs {b}", "{a} vs {b}?", "compare {a} and {b}"]),
+    ("list", 5, ["List all coins", "show me the coins"]),
+    ("help", 5, ["help", "what commands do you know"]),
+    ("fallback", 15, ["Hey, best", "hello there", "what time is it"]),
+]
+
+
+def make_queries(coin_names, n: int, seed: int = 7):
+    """[(kind, query)] drawn from INTENT_MIX with a seeded RNG."""
+    rng = random.Random(seed)
+    kinds = [kind for kind, _, _ in INTENT_MIX]
+    weights = [weight for _, weight, _ in INTENT_MIX]
+    templates = {kind: options for kind, _, options in INTENT_MIX}
+    queries = []
+    for kind in rng.choices(kinds, weights=weights, k=n):
+        a, b = rng.sample(coin_names, 2)
+        queries.append((kind, rng.choice(templates[kind]).format(a=a, b=b)))
+    return queries
+
+
+def write_catalog(path: str, size: int, seed: int = 7):
+    """Coin catalog for smart_crypto: the shipped coins + synthetic ones up to `size`."""
+    rng = random.Random(seed)
+    with open(os.path.join(ROOT, "coin_catalog.json"), encoding="utf-8") as f:
+        entries = [entry for entry in json.load(f) if entry["id"] in REAL_COIN_IDS]
+    for coin_id in universe_ids(size)[len(entries):]:
+        number = coin_id.split("-", 1)[1]
+        entries.append({"name": f"Coin{number}", "id": coin_id, "symbol": f"C{number}",
+                        "aliases": [], "energy_use": rng.choice(["low", "medium", "high"]),
+                        "sustainability_score": round(rng.random(), 3)})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ------------------------------------------------------------------------------
+#                          WORKER (one target, fresh process)
+# ------------------------------------------------------------------------------
+
+def run_worker(args):
+    if args.tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+    started = time.perf_counter()
+    module = __import__(args.worker)
+    import_ms = (time.perf_counter() - started) * 1000
+    registry = getattr(module, "coin_registry", None) or module.crypto_registry
+    queries = make_queries(registry.names(), args.queries, seed=args.seed)
+
+    refresher = getattr(module, "market_refresher", None)
+    if refresher is not None:
+        refresher.start()          # as run_chatbot() does
+    start = time.perf_counter()
+    module.chatbot_response(queries[0][1])
+    first_response_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client(part):
+        local = []
+        for _, query in part:
+            t0 = time.perf_counter()
+            module.chatbot_response(query)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(queries[i::args.threads],))
+               for i in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if refresher is not None:
+        refresher.stop(timeout=5)
+
+    latencies.sort()
+    mix = {}
+    for kind, _ in queries:
+        mix[kind] = mix.get(kind, 0) + 1
+    result = {
+        "target": args.worker,
+        "queries": len(latencies),
+        "threads": args.threads,
+        "coins": len(registry),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_qps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        },
+        "first_response_ms": round(first_response_ms, 3),
+        "import_ms": round(import_ms, 3),
+        "intent_mix": mix,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if args.tracemalloc:
+        result["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    print(json.dumps(result))
+
+
+# ------------------------------------------------------------------------------
+#                                    DRIVER
+# ------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="CryptoBuddy end-to-end benchmark")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--universe", type=int, default=250, help="coins known to the fake API")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake API latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also report peak Python allocations (slows the run)")
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+
+    fake = FakeCoinGecko(latency=args.latency, error_rate=args.error_rate,
+                         universe_size=args.universe, seed=args.seed).start()
+    report = {"config": {"queries": args.queries, "threads": args.threads,
+                         "universe": args.universe, "latency_s": args.latency,
+                         "error_rate": args.error_rate, "seed": args.seed,
+                         "python": sys.version.split()[0]},
+              "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = os.path.join(tmp, "catalog.json")
+        write_catalog(catalog, args.universe, seed=args.seed)
+        env = dict(os.environ,
+                   CRYPTOBUDDY_COINGECKO_URL=fake.base_url,
+                   CRYPTOBUDDY_COIN_CATALOG=catalog,
+                   CRYPTOBUDDY_SNAPSHOT_DB="")       # cold start: no shared snapshot
+        for target in args.targets.split(","):
+            requests_before, errors_before = fake.request_count, fake.error_count
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", target,
+                   "--queries", str(args.queries), "--threads", str(args.threads),
+                   "--seed", str(args.seed)] + (["--tracemalloc"] if args.tracemalloc else [])
+            proc = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+            if proc.returncode != 0:
+                report["results"].append({"target": target, "error": proc.stderr.strip()[-2000:]})
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result["upstream_requests"] = fake.request_count - requests_before
+            result["upstream_errors_injected"] = fake.error_count - errors_before
+            report["results"].append(result)
+    fake.stop()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
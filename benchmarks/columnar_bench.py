@@ -0,0 +1,94 @@
+# benchmarks/columnar_bench.py
+
+"""
+Benchmark: smart_crypto.sync_registry_market with and without the columnar store.
+
+For N synthetic coins, times the real refresh path – push a snapshot’s market
+categories into coin_registry – both ways:
+  python   – categorize_price_trend / categorize_market_cap per coin +
+             registry.update_market;
+  columnar – ColumnarCoinStore.load_markets (vectorized categorization) +
+             registry.update_market for the rows whose category changed;
+`first_ms` is the first snapshot (every coin gets a category, and for the
+columnar path the store is built), `next_ms` the median of the following
+snapshots, in which prices drift a little and only some categories change.
+Both must leave the registry with the same top rising + high-cap coin.
+
+  python benchmarks/columnar_bench.py --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("CRYPTOBUDDY_SNAPSHOT_DB", "")
+
+import smart_crypto  # noqa: E402
+from coin_columns import HAS_NUMPY  # noqa: E402
+from coin_registry import CoinRecord, CoinRegistry  # noqa: E402
+from market_snapshot import MarketSnapshot  # noqa: E402
+
+
+def make_universe(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    records = [CoinRecord(f"Coin{i}", f"coin-{i}", sustainability_score=rng.random())
+               for i in range(n)]
+    markets = {r.coin_id: {"price_change_24h": rng.uniform(-10, 10),
+                           "market_cap_usd": 10 ** rng.uniform(8, 12)}
+               for r in records}
+    return records, markets
+
+
+def snapshots(markets, count: int, seed: int = 7):
+    """`count` snapshots; each moves every 24h change by up to ±0.5 points."""
+    rng = random.Random(seed)
+    current = {coin_id: dict(fields) for coin_id, fields in markets.items()}
+    for version in range(1, count + 1):
+        yield MarketSnapshot(version, time.time(), current)
+        for fields in current.values():
+            fields["price_change_24h"] += rng.uniform(-0.5, 0.5)
+
+
+def run(records, markets, columnar: bool, count: int):
+    """(first_ms, median next_ms, top pick) of `count` syncs on a fresh registry."""
+    smart_crypto.coin_registry = CoinRegistry(records)
+    smart_crypto._market_columns = None
+    smart_crypto._registry_market_version = None
+    smart_crypto.USE_COLUMNAR_STORE = columnar
+    smart_crypto.COLUMNAR_MIN_COINS = 0
+    times = []
+    for snapshot in snapshots(markets, count):
+        start = time.perf_counter()
+        smart_crypto.sync_registry_market(snapshot)
+        times.append((time.perf_counter() - start) * 1000)
+    pick = smart_crypto.coin_registry.top_in_category("rising", "high", 1)
+    return round(times[0], 3), round(statistics.median(times[1:]), 3), pick
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sync_registry_market: Python vs columnar")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--snapshots", type=int, default=11)
+    args = parser.parse_args()
+    if not HAS_NUMPY:
+        sys.exit("NumPy is not installed; the columnar store is unavailable.")
+
+    results = []
+    for n in [int(x) for x in args.sizes.split(",")]:
+        records, markets = make_universe(n)
+        py_first, py_next, py_pick = run(records, markets, False, args.snapshots)
+        col_first, col_next, col_pick = run(records, markets, True, args.snapshots)
+        results.append({"coins": n,
+                        "python_first_ms": py_first, "python_next_ms": py_next,
+                        "columnar_first_ms": col_first, "columnar_next_ms": col_next,
+                        "same_pick": py_pick == col_pick})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/import_time.py
+
+"""
+Measure how long `import smart_crypto` takes in a fresh interpreter.
+
+Each run starts a new Python process, imports the module and reads
+smart_crypto.IMPORT_TIME_MS, plus whether NLTK got imported as a side effect.
+Exits with status 1 if the median exceeds --budget-ms, so it can guard CI
+against startup regressions.
+
+  python benchmarks/import_time.py --runs 5 --budget-ms 500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = (
+    "import json, sys, time\n"
+    "t = time.perf_counter()\n"
+    "import smart_crypto\n"
+    "total = (time.perf_counter() - t) * 1000\n"
+    "print(json.dumps({'total_ms': total,\n"
+    "                  'module_ms': smart_crypto.IMPORT_TIME_MS,\n"
+    "                  'nltk_imported': 'nltk' in sys.modules}))\n"
+)
+
+
+def measure_once():
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=REPO_ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure smart_crypto import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if the median total import time exceeds this")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    totals = sorted(r["total_ms"] for r in runs)
+    report = {
+        "runs": args.runs,
+        "median_ms": round(statistics.median(totals), 2),
+        "min_ms": round(totals[0], 2),
+        "max_ms": round(totals[-1], 2),
+        "module_body_median_ms": round(statistics.median(r["module_ms"] for r in runs), 2),
+        "nltk_imported": any(r["nltk_imported"] for r in runs),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.budget_ms is not None and report["median_ms"] > args.budget_ms:
+        print(f"Import time {report['median_ms']}ms exceeds budget {args.budget_ms}ms",
+              file=sys.stderr)
+        sys.exit(1)
+    if report["nltk_imported"]:
+        print("NLTK was imported at module import time (should be lazy)", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
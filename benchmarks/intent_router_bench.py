@@ -0,0 +1,68 @@
+# benchmarks/intent_router_bench.py
+
+"""
+Micro-benchmark: per-query routing cost as the number of intents grows.
+
+Compares IntentRouter.classify (one pass over the stems, dict lookups) with
+the old style of routing — a sequential chain of `"x" in stems` tests — for
+routers with 5 … 5000 synthetic intents (3 stems each). The queries hit the
+last registered intent, or nothing at all, which is the worst case for a
+sequential chain.
+
+  python benchmarks/intent_router_bench.py
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_router import IntentRouter  # noqa: E402
+
+
+def build(n_intents: int):
+    router = IntentRouter()
+    chain = []
+    for i in range(n_intents):
+        stems = [f"kw{i}a", f"kw{i}b", f"kw{i}c"]
+        router.register(f"intent{i}", handler=None, stems=stems)
+        chain.append((f"intent{i}", stems))
+    return router, chain
+
+
+def classify_chain(chain, stems):
+    """The if-chain equivalent: test every keyword of every intent in order."""
+    for name, keywords in chain:
+        for keyword in keywords:
+            if keyword in stems:
+                return name
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent routing micro-benchmark")
+    parser.add_argument("--sizes", default="5,50,500,5000")
+    parser.add_argument("--number", type=int, default=2000, help="queries per measurement")
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(x) for x in args.sizes.split(",")]:
+        router, chain = build(n)
+        queries = [
+            ["which", "coin", "is", f"kw{n - 1}b", "?"],          # last intent
+            ["hey", ",", "what", "is", "up", "today", "?"],       # no intent
+        ]
+        row = {"intents": n}
+        for label, fn in (("router", lambda q: router.classify(q)),
+                          ("if_chain", lambda q: classify_chain(chain, q))):
+            number = args.number if label == "router" or n <= 500 else max(1, args.number // 20)
+            best = min(timeit.repeat(lambda: [fn(q) for q in queries], number=number, repeat=3))
+            row[f"{label}_us_per_query"] = round(best / (number * len(queries)) * 1e6, 3)
+        results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
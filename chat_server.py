@@ -0,0 +1,272 @@
+# chat_server.py
+
+"""
+Multi-session HTTP server for CryptoBuddy (standard library only).
+
+Exposes smart_crypto.chatbot_response to many concurrent users:
+
+  POST /chat      {"session_id": "<optional>", "message": "Which crypto is trending up?"}
+                  → {"session_id": "...", "turn": 1, "reply": "🤖 CryptoBuddy: ..."}
+  DELETE /sessions/<id>   end a session
+  GET  /healthz           {"status": "ok", "sessions": N, "snapshot_version": V,
+                           "response_cache": {...hit/miss counters...},
+                           "upstream_flight": {"calls", "collapsed", "in_flight"},
+                           "rate_limiter": {"acquired", "waits", "total_wait_seconds", …}}
+  GET  /metrics           Prometheus text (stage timings, counters); needs
+                          CRYPTOBUDDY_METRICS=1 for the timings
+
+Connections are handled by a fixed pool of worker threads (--workers). A
+keep-alive connection holds its worker until the client closes it or leaves it
+idle for ChatRequestHandler.timeout seconds, so --workers is also the number of
+clients served at once; further connections wait in the listen backlog
+(--backlog) until a worker frees up. Each session keeps its own state (turn count + recent history); idle sessions expire
+after --session-ttl seconds. Ctrl-C / SIGTERM stop accepting new connections,
+let in-flight requests finish, then stop the market refresher.
+
+  python chat_server.py --port 8000 --workers 16
+"""
+import argparse
+import json
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import smart_crypto
+
+EXIT_WORDS = {"exit", "quit", "bye"}
+
+# ------------------------------------------------------------------------------
+#                                SESSION STATE
+# ------------------------------------------------------------------------------
+
+class ChatSession:
+    """State kept for one user between requests."""
+
+    def __init__(self, session_id: str, history_size: int = 20):
+        self.session_id = session_id
+        self.created_at = time.time()
+        self.last_seen = self.created_at
+        self.turns = 0
+        self.history = deque(maxlen=history_size)   # (user message, reply) pairs
+        self.lock = threading.Lock()                 # one request per session at a time
+
+
+class SessionStore:
+    """Thread-safe session registry with idle expiry and a size bound."""
+
+    def __init__(self, ttl: float = 1800.0, max_sessions: int = 10_000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, session_id=None) -> ChatSession:
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    self._expire_locked(now)
+                if len(self._sessions) >= self.max_sessions:
+                    # Still full: drop the least recently seen session
+                    oldest = min(self._sessions.values(), key=lambda s: s.last_seen)
+                    del self._sessions[oldest.session_id]
+                session = ChatSession(session_id or uuid.uuid4().hex)
+                self._sessions[session.session_id] = session
+            session.last_seen = now
+            return session
+
+    def end(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def expire(self):
+        with self._lock:
+            self._expire_locked(time.time())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _expire_locked(self, now: float):
+        for session_id in [s.session_id for s in self._sessions.values()
+                           if now - s.last_seen > self.ttl]:
+            del self._sessions[session_id]
+
+# ------------------------------------------------------------------------------
+#                                HTTP HANDLING
+# ------------------------------------------------------------------------------
+
+class ChatRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY, Nagle +
+    # delayed ACK add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    # Close idle keep-alive connections so they don’t pin a worker forever
+    timeout = 5
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            snapshot = smart_crypto.market_refresher.current()
+            self._send_json(200, {"status": "ok",
+                                  "sessions": len(self.server.sessions),
+                                  "snapshot_version": snapshot.version if snapshot else None,
+                                  "response_cache": smart_crypto.response_cache_stats(),
+                                  "upstream_flight": smart_crypto.upstream_flight.stats(),
+                                  "rate_limiter": smart_crypto.coingecko_rate_limiter.stats()})
+        elif self.path == "/metrics":
+            self._send_text(200, smart_crypto.metrics.prometheus(),
+                            "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_DELETE(self):
+        if self.path.startswith("/sessions/"):
+            ended = self.server.sessions.end(self.path[len("/sessions/"):])
+            self._send_json(200 if ended else 404, {"ended": ended})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/chat":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            with smart_crypto.metrics.time("http_read_request"):
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            message = str(payload.get("message", "")).strip()
+        except (ValueError, AttributeError):
+            self._send_json(400, {"error": "Body must be JSON with a 'message' field"})
+            return
+
+        sessions = self.server.sessions
+        session = sessions.get_or_create(payload.get("session_id"))
+        if message.lower() in EXIT_WORDS:
+            sessions.end(session.session_id)
+            self._send_json(200, {"session_id": session.session_id, "turn": session.turns,
+                                  "reply": f"{smart_crypto.BOT_NAME}: Bye! Happy—and informed—investing! 👋",
+                                  "ended": True})
+            return
+
+        with session.lock:
+            try:
+                reply = smart_crypto.chatbot_response(message)
+            except Exception as e:
+                smart_crypto.metrics.incr("errors_total", stage="chatbot_response")
+                print(f"Error answering session {session.session_id}: {e}")
+                self._send_json(500, {"session_id": session.session_id,
+                                      "error": "Internal error"})
+                return
+            session.turns += 1
+            session.history.append((message, reply))
+            turn = session.turns
+        self._send_json(200, {"session_id": session.session_id, "turn": turn, "reply": reply})
+
+    def _send_json(self, status: int, payload):
+        self._send_text(status, json.dumps(payload, ensure_ascii=False),
+                        "application/json; charset=utf-8")
+
+    def _send_text(self, status: int, text: str, content_type: str):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ChatServer(HTTPServer):
+    """
+    HTTPServer whose connections are handled on a fixed-size thread pool.
+
+    Each worker serves one connection at a time, keep-alive requests included;
+    `backlog` is the listen queue for connections waiting for one (the socket
+    module default of 5 resets clients as soon as a few more than `workers`
+    connect at once).
+
+      server = ChatServer(("127.0.0.1", 8000), workers=16)
+      server.serve_forever()      # in another thread: server.graceful_shutdown()
+    """
+
+    def __init__(self, address, workers: int = 16, sessions: SessionStore = None,
+                 backlog: int = 128):
+        self.request_queue_size = backlog
+        super().__init__(address, ChatRequestHandler)
+        self.workers = workers
+        self.sessions = sessions or SessionStore()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-worker")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def service_actions(self):
+        # Called by serve_forever between polls: cheap place to expire idle sessions
+        self.sessions.expire()
+
+    def graceful_shutdown(self):
+        """Stop accepting connections and wait for in-flight requests to finish."""
+        self.shutdown()
+        self._pool.shutdown(wait=True)
+        self.server_close()
+
+
+def start_server(host: str = "127.0.0.1", port: int = 8000, workers: int = 16,
+                 session_ttl: float = 1800.0, backlog: int = 128):
+    """Start a ChatServer (and the market refresher) on a background thread."""
+    smart_crypto.market_refresher.start()
+    server = ChatServer((host, port), workers=workers, sessions=SessionStore(ttl=session_ttl),
+                        backlog=backlog)
+    threading.Thread(target=server.serve_forever, name="chat-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CryptoBuddy multi-session chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=16,
+                        help="worker threads; each serves one (keep-alive) connection at a time")
+    parser.add_argument("--backlog", type=int, default=128,
+                        help="connections queued while every worker is busy")
+    parser.add_argument("--session-ttl", type=float, default=1800.0,
+                        help="seconds of inactivity before a session is dropped")
+    parser.add_argument("--coingecko-url", default=None,
+                        help="CoinGecko base URL (e.g. a local fake_coingecko.py)")
+    args = parser.parse_args()
+
+    if args.coingecko_url:
+        smart_crypto.use_coingecko(args.coingecko_url)
+
+    server = start_server(args.host, args.port, args.workers, args.session_ttl, args.backlog)
+    print(f"{smart_crypto.BOT_NAME} server listening on http://{args.host}:{args.port} "
+          f"with {args.workers} workers")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    stopping.wait()
+
+    print("Shutting down: finishing in-flight requests…")
+    server.graceful_shutdown()
+    smart_crypto.market_refresher.stop(timeout=5)
+    print("Bye! 👋")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# coin_columns.py
+
+"""
+Optional columnar (NumPy) coin-state store for CryptoBuddy.
+
+Holds 24h price change, market cap (USD) and sustainability score for the whole
+coin universe in NumPy arrays, with price trend / market-cap categories as
+small integer codes. Categorizing every coin after a snapshot refresh and the
+“rising + high market cap, best sustainability” pick are then a handful of
+vectorized operations instead of a Python loop over dicts.
+
+NumPy is optional: HAS_NUMPY is False when it isn’t installed, and callers
+fall back to the plain-Python path (categorize_* in smart_crypto.py). It is
+imported on first use, not when this module is imported (see
+benchmarks/import_time.py).
+"""
+from importlib.util import find_spec
+from itertools import repeat
+from operator import itemgetter
+
+HAS_NUMPY = find_spec("numpy") is not None
+np = None   # the numpy module, once _load_numpy() has run
+
+
+def _load_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+# Category codes (index into the *_LABELS tuples)
+TREND_FALLING, TREND_STABLE, TREND_RISING = 0, 1, 2
+TREND_LABELS = ("falling", "stable", "rising")
+CAP_LOW, CAP_MEDIUM, CAP_HIGH = 0, 1, 2
+CAP_LABELS = ("low", "medium", "high")
+
+# Same thresholds as categorize_price_trend / categorize_market_cap in smart_crypto.py
+RISING_ABOVE_PCT = 1.0
+FALLING_BELOW_PCT = -1.0
+HIGH_CAP_USD = 50_000_000_000
+MEDIUM_CAP_USD = 10_000_000_000
+
+UNKNOWN = -1   # code for coins with no market data yet
+
+_get_pct = itemgetter("price_change_24h")
+_get_cap = itemgetter("market_cap_usd")
+
+
+def categorize_price_trends(pct_change_24h):
+    """Vectorized categorize_price_trend: array of % changes → int8 trend codes."""
+    _load_numpy()
+    pct = np.asarray(pct_change_24h, dtype=np.float64)
+    codes = np.full(pct.shape, TREND_STABLE, dtype=np.int8)
+    codes[pct > RISING_ABOVE_PCT] = TREND_RISING
+    codes[pct < FALLING_BELOW_PCT] = TREND_FALLING
+    return codes
+
+
+def categorize_market_caps(market_cap_usd):
+    """Vectorized categorize_market_cap: array of USD caps → int8 cap codes."""
+    _load_numpy()
+    usd = np.asarray(market_cap_usd, dtype=np.float64)
+    codes = np.full(usd.shape, CAP_LOW, dtype=np.int8)
+    codes[usd >= MEDIUM_CAP_USD] = CAP_MEDIUM
+    codes[usd >= HIGH_CAP_USD] = CAP_HIGH
+    return codes
+
+
+class ColumnarCoinStore:
+    """
+      store = ColumnarCoinStore(names, coin_ids, sustainability_scores)
+      changed = store.load_markets({"bitcoin": {"price_change_24h": 2.1, "market_cap_usd": 1e12}})
+      store.best_rising_high_cap()   → "Bitcoin"
+
+    Row i always describes names[i]; the row order is fixed at construction.
+    """
+
+    def __init__(self, names, coin_ids, sustainability_scores):
+        if not HAS_NUMPY:
+            raise RuntimeError("ColumnarCoinStore needs NumPy (pip install numpy)")
+        _load_numpy()
+        self.names = list(names)
+        self.coin_ids = list(coin_ids)
+        self.row_of = {coin_id: i for i, coin_id in enumerate(self.coin_ids)}
+        n = len(self.names)
+        self.sustainability = np.asarray(sustainability_scores, dtype=np.float64)
+        self.price_change = np.zeros(n, dtype=np.float64)
+        self.market_cap_usd = np.zeros(n, dtype=np.float64)
+        self.trend = np.full(n, UNKNOWN, dtype=np.int8)
+        self.cap = np.full(n, UNKNOWN, dtype=np.int8)
+
+    @classmethod
+    def from_registry(cls, registry):
+        records = list(registry)
+        return cls([r.name for r in records], [r.coin_id for r in records],
+                   [r.sustainability_score for r in records])
+
+    def __len__(self):
+        return len(self.names)
+
+    def load_markets(self, markets):
+        """
+        Update rows from {coin_id: {"price_change_24h", "market_cap_usd"}}
+        (e.g. snapshot.coins) and recategorize them.
+        Returns the row indices whose (trend, cap) category changed.
+        """
+        n = len(markets)
+        if n == 0:
+            return np.empty(0, dtype=np.intp)
+        # Ingest with C-level map/itemgetter instead of a Python loop per coin
+        rows = np.fromiter(map(self.row_of.get, markets.keys(), repeat(-1)),
+                           dtype=np.intp, count=n)
+        pct = np.fromiter(map(_get_pct, markets.values()), dtype=np.float64, count=n)
+        usd = np.fromiter(map(_get_cap, markets.values()), dtype=np.float64, count=n)
+        known = rows >= 0
+        if not known.all():
+            rows, pct, usd = rows[known], pct[known], usd[known]
+        self.price_change[rows] = pct
+        self.market_cap_usd[rows] = usd
+
+        new_trend = categorize_price_trends(pct)
+        new_cap = categorize_market_caps(usd)
+        changed = (new_trend != self.trend[rows]) | (new_cap != self.cap[rows])
+        self.trend[rows] = new_trend
+        self.cap[rows] = new_cap
+        return rows[changed]
+
+    def recategorize(self):
+        """Recompute every category code from the stored columns (fully vectorized)."""
+        has_data = self.trend != UNKNOWN
+        self.trend = np.where(has_data, categorize_price_trends(self.price_change),
+                              UNKNOWN).astype(np.int8)
+        self.cap = np.where(has_data, categorize_market_caps(self.market_cap_usd),
+                            UNKNOWN).astype(np.int8)
+
+    def category(self, row: int):
+        """(price_trend, market_cap) labels for one row, or None without data."""
+        if self.trend[row] == UNKNOWN:
+            return None
+        return TREND_LABELS[self.trend[row]], CAP_LABELS[self.cap[row]]
+
+    def rising_high_cap_mask(self):
+        return (self.trend == TREND_RISING) & (self.cap == CAP_HIGH)
+
+    def best_rising_high_cap(self):
+        """Rising + high-cap coin with the best sustainability score, or None."""
+        rows = np.flatnonzero(self.rising_high_cap_mask())
+        if rows.size == 0:
+            return None
+        return self.names[rows[np.argmax(self.sustainability[rows])]]
+
+    def top_rising_high_cap(self, k: int = 5):
+        """Up to k rising + high-cap coins, most sustainable first."""
+        rows = np.flatnonzero(self.rising_high_cap_mask())
+        if rows.size > k:
+            rows = rows[np.argpartition(-self.sustainability[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-self.sustainability[rows], kind="stable")]
+        return [self.names[i] for i in rows]
@@ -0,0 +1,283 @@
+# coin_entities.py
+
+"""
+Coin-name entity extraction for CryptoBuddy.
+
+Finds every coin mentioned in a query in one scan, however many coins we track:
+  - an Aho-Corasick automaton over lowercased names, aliases and symbols gives
+    all exact mentions in a single pass over the text (word boundaries enforced);
+  - a trigram index + bounded edit distance catches typos like “bitcon” or
+    “etherium” for words the automaton did not match. Names and aliases
+    shorter than FUZZY_MIN_TERM_LENGTH are matched exactly only: one edit away
+    from a short alias like “ether” are ordinary words (“other”, “either”).
+
+Symbols (BTC, ETH, DOT, …) often collide with ordinary words, so they only
+match when written in upper case or with a “$” prefix (“$dot”).
+
+  extractor = CoinEntityExtractor()
+  extractor.add("Bitcoin", names=["bitcoin"], symbols=["BTC"])
+  extractor.extract("compare btc vs etherium")   → ["Bitcoin", "Ethereum"]
+"""
+import threading
+from collections import deque
+
+# Only names/aliases this long go into the fuzzy index (typos are allowed 1
+# edit up to 5 characters, 2 beyond), so a word needs FUZZY_MIN_TERM_LENGTH - 1
+# characters to be within reach of any of them
+FUZZY_MIN_TERM_LENGTH = 6
+
+# Words that must never be fuzzy-matched to a coin
+FUZZY_STOPWORDS = {
+    "about", "best", "coin", "coins", "compare", "crypto", "green", "help", "list",
+    "most", "show", "than", "that", "this", "trend", "trending", "what", "which",
+    "with", "better", "profit", "price", "today", "should", "would", "could",
+}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            current.append(cost)
+            row_min = min(row_min, cost)
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+# Fuzzy lookups are memoized per word; the memo is simply dropped when full
+FUZZY_CACHE_SIZE = 4096
+
+
+def trigrams(word: str):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CoinEntityExtractor:
+    def __init__(self):
+        # Trie of every term, extended in place by add(): node 0 is the root
+        self._goto = [{}]          # node -> {char: node}
+        self._own = [[]]           # node -> [(term length, coin, is_symbol)] ending here
+        # Aho-Corasick automaton (goto, fail, out) built from the trie by _build();
+        # replaced, never modified, so find_exact() can run while add() extends
+        # the trie. None until rebuilt after an add().
+        self._automaton = ([{}], [0], [[]])
+        self._lock = threading.Lock()   # guards the trie, the fuzzy index and rebuilds
+        # Fuzzy index over single-word names/aliases
+        self._fuzzy_terms = []     # term id -> (term, coin)
+        self._trigram_index = {}   # (trigram, term length) -> [term ids]
+        self._fuzzy_cache = {}     # word -> coin or None
+        self._coins = set()
+
+    @classmethod
+    def from_coins(cls, names, symbols=None, aliases=None):
+        """
+        Build an extractor from coin names plus optional {name: symbol} and
+        {name: [aliases]} mappings.
+        """
+        extractor = cls()
+        symbols = symbols or {}
+        aliases = aliases or {}
+        for name in names:
+            symbol = symbols.get(name)
+            extractor.add(name, names=[name] + list(aliases.get(name, ())),
+                          symbols=[symbol] if symbol else ())
+        return extractor
+
+    def add(self, coin: str, names=(), symbols=()):
+        """Register a coin under its names/aliases and ticker symbols (thread-safe)."""
+        with self._lock:
+            self._coins.add(coin)
+            for term in names:
+                term = term.lower().strip()
+                if not term:
+                    continue
+                self._insert(term, coin, is_symbol=False)
+                if " " not in term and len(term) >= FUZZY_MIN_TERM_LENGTH:
+                    term_id = len(self._fuzzy_terms)
+                    self._fuzzy_terms.append((term, coin))
+                    for gram in trigrams(term):
+                        self._trigram_index.setdefault((gram, len(term)), []).append(term_id)
+            for symbol in symbols:
+                symbol = symbol.lower().strip()
+                if symbol:
+                    self._insert(symbol, coin, is_symbol=True)
+            self._fuzzy_cache.clear()
+
+    def __len__(self):
+        return len(self._coins)
+
+    # -- matching ------------------------------------------------------------------
+
+    def extract(self, text: str, fuzzy: bool = True, min_exact: int = None):
+        """
+        Coins mentioned in `text`, in order of first mention, without duplicates.
+        Words not matched exactly are tried against the fuzzy index if `fuzzy`
+        (and, when `min_exact` is given, only if fewer than `min_exact` coins
+        matched exactly).
+        """
+        found = []
+        seen = set()
+        matches = self.find_exact(text)
+        for start, _, coin in matches:
+            if coin not in seen:
+                seen.add(coin)
+                found.append((start, coin))
+        if fuzzy and (min_exact is None or len(found) < min_exact):
+            covered = [(start, end) for start, end, _ in matches]
+            for start, word in self._words(text):
+                if any(s <= start < e for s, e in covered):
+                    continue
+                coin = self.fuzzy_lookup(word)
+                if coin is not None and coin not in seen:
+                    seen.add(coin)
+                    found.append((start, coin))
+        found.sort(key=lambda item: item[0])
+        return [coin for _, coin in found]
+
+    def find_exact(self, text: str):
+        """
+        All exact mentions as (start, end, coin), leftmost-longest and
+        non-overlapping, in one pass of the automaton over `text`.
+        """
+        automaton = self._automaton
+        if automaton is None:
+            automaton = self._build()
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Some characters lowercase to several (e.g. “İ”); keep those as they
+            # are so offsets into `lowered` are offsets into `text` too
+            lowered = "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+        goto, fail, out = automaton
+        candidates = []
+        node = 0
+        for i, ch in enumerate(lowered):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, coin, is_symbol in out[node]:
+                start, end = i + 1 - length, i + 1
+                if not self._at_word_boundary(lowered, start, end):
+                    continue
+                if is_symbol and not (text[start:end].isupper()
+                                      or (start > 0 and text[start - 1] == "$")):
+                    continue
+                candidates.append((start, end, coin))
+
+        # Leftmost-longest, non-overlapping
+        candidates.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        matches = []
+        last_end = -1
+        for start, end, coin in candidates:
+            if start >= last_end:
+                matches.append((start, end, coin))
+                last_end = end
+        return matches
+
+    def fuzzy_lookup(self, word: str):
+        """Best coin whose name/alias is within a small edit distance of `word`."""
+        word = word.lower()
+        if len(word) < FUZZY_MIN_TERM_LENGTH - 1 or word in FUZZY_STOPWORDS:
+            return None
+        try:
+            return self._fuzzy_cache[word]
+        except KeyError:
+            pass
+        if len(self._fuzzy_cache) >= FUZZY_CACHE_SIZE:
+            self._fuzzy_cache.clear()
+        coin = self._fuzzy_cache[word] = self._fuzzy_search(word)
+        return coin
+
+    def _fuzzy_search(self, word: str):
+        limit = 1 if len(word) <= 5 else 2
+        counts = {}
+        grams = trigrams(word)
+        index = self._trigram_index
+        # Terms more than `limit` characters longer/shorter can’t be close enough
+        for length in range(len(word) - limit, len(word) + limit + 1):
+            for gram in grams:
+                for term_id in index.get((gram, length), ()):
+                    counts[term_id] = counts.get(term_id, 0) + 1
+        if not counts:
+            return None
+        # Only verify terms sharing enough trigrams to be within `limit` edits
+        needed = max(1, len(grams) - 3 * limit)
+        best, best_distance = None, limit + 1
+        for term_id, shared in counts.items():
+            if shared < needed:
+                continue
+            term, coin = self._fuzzy_terms[term_id]
+            distance = edit_distance(word, term, limit)
+            if distance < best_distance:
+                best, best_distance = coin, distance
+        return best
+
+    # -- automaton construction ----------------------------------------------------
+
+    def _insert(self, term: str, coin: str, is_symbol: bool):
+        node = 0
+        for ch in term:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._own.append([])
+            node = nxt
+        self._own[node].append((len(term), coin, is_symbol))
+        self._automaton = None
+
+    def _build(self):
+        """
+        Snapshot the trie, compute failure links breadth-first and merge outputs
+        along them; publish and return the new (goto, fail, out).
+        """
+        with self._lock:
+            if self._automaton is not None:     # another thread just built it
+                return self._automaton
+            goto = [dict(children) for children in self._goto]
+            own = self._own
+            fail = [0] * len(goto)
+            out = [list(own[0])] + [None] * (len(goto) - 1)
+            queue = deque()
+            for child in goto[0].values():
+                out[child] = list(own[child])
+                queue.append(child)
+            while queue:
+                node = queue.popleft()
+                for ch, child in goto[node].items():
+                    f = fail[node]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[child] = goto[f].get(ch, 0)
+                    # fail[child] is shallower, so its outputs are already complete
+                    out[child] = own[child] + out[fail[child]]
+                    queue.append(child)
+            self._automaton = (goto, fail, out)
+            return self._automaton
+
+    @staticmethod
+    def _at_word_boundary(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not before.isalnum() and not after.isalnum()
+
+    @staticmethod
+    def _words(text: str):
+        """(start offset, word) for each alphanumeric word in text."""
+        word_start = None
+        for i, ch in enumerate(text + " "):
+            if ch.isalnum():
+                if word_start is None:
+                    word_start = i
+            elif word_start is not None:
+                yield word_start, text[word_start:i]
+                word_start = None
@@ -0,0 +1,224 @@
+# coin_registry.py
+
+"""
+Coin registry for CryptoBuddy: the universe of tracked coins.
+
+Loads any number of coins (ids, symbols, aliases, energy use, sustainability
+scores) from a JSON catalog file and keeps rankings precomputed, so queries
+like “most sustainable” or “rising + high market cap” read the top k entries
+instead of running max() over every coin:
+
+  - one list of all coins sorted by sustainability (best first);
+  - one such list per (price_trend, market_cap) category bucket, fed by
+    update_market() whenever a coin’s live market category changes.
+
+Single-coin changes (update_coin / update_market) are applied incrementally
+with bisect, without re-sorting the universe.
+
+Catalog format (coin_catalog.json):
+  [{"name": "Bitcoin", "id": "bitcoin", "symbol": "BTC", "aliases": [],
+    "energy_use": "high", "sustainability_score": 0.3}, ...]
+"""
+import heapq
+import json
+import threading
+from bisect import bisect_left, insort
+
+
+class CoinRecord:
+    """Static facts about one coin."""
+
+    __slots__ = ("name", "coin_id", "symbol", "aliases", "energy_use", "sustainability_score")
+
+    def __init__(self, name: str, coin_id: str, symbol: str = "", aliases=(),
+                 energy_use: str = "unknown", sustainability_score: float = 0.0):
+        self.name = name
+        self.coin_id = coin_id
+        self.symbol = symbol
+        self.aliases = list(aliases)
+        self.energy_use = energy_use
+        self.sustainability_score = float(sustainability_score)
+
+    @classmethod
+    def from_dict(cls, entry: dict):
+        return cls(name=entry["name"],
+                   coin_id=entry.get("id") or entry["name"].lower(),
+                   symbol=entry.get("symbol", ""),
+                   aliases=entry.get("aliases", ()),
+                   energy_use=entry.get("energy_use", "unknown"),
+                   sustainability_score=entry.get("sustainability_score", 0.0))
+
+    def to_dict(self):
+        return {"name": self.name, "id": self.coin_id, "symbol": self.symbol,
+                "aliases": list(self.aliases), "energy_use": self.energy_use,
+                "sustainability_score": self.sustainability_score}
+
+    def __repr__(self):
+        return f"CoinRecord({self.name!r}, id={self.coin_id!r}, score={self.sustainability_score})"
+
+
+class CoinRegistry:
+    """
+    Thread-safe registry with precomputed rankings.
+
+    `id_map` ({name: coin_id}) and `sustainability_db`
+    ({name: {"energy_use", "sustainability_score"}}) are kept up to date as
+    plain dicts for code that reads COIN_ID_MAP / SUSTAINABILITY_DB directly.
+    """
+
+    def __init__(self, records=()):
+        self._records = {}           # name -> CoinRecord
+        self._by_id = {}             # coin_id -> name
+        self._by_score = []          # sorted [(-score, name)]
+        self._categories = {}        # name -> (price_trend, market_cap)
+        self._buckets = {}           # (price_trend, market_cap) -> sorted [(-score, name)]
+        self._lock = threading.RLock()
+        self.id_map = {}
+        self.sustainability_db = {}
+        # Bulk load: fill the maps, then sort once instead of insort per coin
+        for record in records:
+            old = self._records.get(record.name)
+            if old is not None:
+                self._by_id.pop(old.coin_id, None)
+            self._store(record)
+        self._by_score = sorted((-r.sustainability_score, r.name) for r in self._records.values())
+
+    @classmethod
+    def load(cls, path: str):
+        """Build a registry from a JSON catalog file (a list of coin entries)."""
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        return cls(CoinRecord.from_dict(entry) for entry in entries)
+
+    def save(self, path: str):
+        with self._lock:
+            entries = [record.to_dict() for record in self._records.values()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+
+    # -- lookups -------------------------------------------------------------------
+
+    def get(self, name: str):
+        return self._records.get(name)
+
+    def name_for_id(self, coin_id: str):
+        return self._by_id.get(coin_id)
+
+    def names(self):
+        return list(self._records)
+
+    def symbols(self):
+        """{name: symbol} for coins that have one."""
+        return {name: r.symbol for name, r in self._records.items() if r.symbol}
+
+    def aliases(self):
+        """{name: [aliases]} for coins that have any."""
+        return {name: list(r.aliases) for name, r in self._records.items() if r.aliases}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, name):
+        return name in self._records
+
+    def __iter__(self):
+        return iter(list(self._records.values()))
+
+    # -- rankings ------------------------------------------------------------------
+
+    def top_sustainable(self, k: int = 1):
+        """The k coins with the highest sustainability_score (ties: by name)."""
+        with self._lock:
+            return [name for _, name in self._by_score[:k]]
+
+    def top_in_category(self, price_trend: str, market_cap: str, k: int = 1):
+        """
+        The k most sustainable coins whose latest market data put them in
+        (price_trend, market_cap), e.g. ("rising", "high").
+        """
+        with self._lock:
+            return [name for _, name in self._buckets.get((price_trend, market_cap), ())[:k]]
+
+    def in_market_cap(self, market_cap: str):
+        """
+        Coins of one market-cap category, whatever their price trend, most
+        sustainable first (a merge of those buckets, not a scan of every coin).
+        """
+        with self._lock:
+            buckets = [list(ranking) for (_, cap), ranking in self._buckets.items()
+                       if cap == market_cap]
+        return [name for _, name in heapq.merge(*buckets)]
+
+    def category(self, name: str):
+        return self._categories.get(name)
+
+    # -- incremental updates -------------------------------------------------------
+
+    def update_coin(self, record: CoinRecord):
+        """Add a coin or replace its static data, keeping every ranking sorted."""
+        with self._lock:
+            old = self._records.get(record.name)
+            if old is not None:
+                self._unrank(old)
+                self._by_id.pop(old.coin_id, None)
+            self._store(record)
+            self._rank(record)
+
+    def remove_coin(self, name: str):
+        with self._lock:
+            record = self._records.pop(name, None)
+            if record is None:
+                return
+            self._unrank(record)
+            self._categories.pop(name, None)
+            self._by_id.pop(record.coin_id, None)
+            self.id_map.pop(name, None)
+            self.sustainability_db.pop(name, None)
+
+    def update_market(self, name: str, price_trend: str, market_cap: str) -> bool:
+        """
+        Record a coin’s current market category. Only moves the coin between
+        buckets when its category actually changed. Returns True if it moved.
+        """
+        with self._lock:
+            record = self._records.get(name)
+            if record is None:
+                return False
+            new = (price_trend, market_cap)
+            old = self._categories.get(name)
+            if old == new:
+                return False
+            key = (-record.sustainability_score, name)
+            if old is not None:
+                self._remove_key(self._buckets[old], key)
+            insort(self._buckets.setdefault(new, []), key)
+            self._categories[name] = new
+            return True
+
+    def _store(self, record: CoinRecord):
+        self._records[record.name] = record
+        self._by_id[record.coin_id] = record.name
+        self.id_map[record.name] = record.coin_id
+        self.sustainability_db[record.name] = {
+            "energy_use": record.energy_use,
+            "sustainability_score": record.sustainability_score}
+
+    def _rank(self, record: CoinRecord):
+        key = (-record.sustainability_score, record.name)
+        insort(self._by_score, key)
+        category = self._categories.get(record.name)
+        if category is not None:
+            insort(self._buckets.setdefault(category, []), key)
+
+    def _unrank(self, record: CoinRecord):
+        key = (-record.sustainability_score, record.name)
+        self._remove_key(self._by_score, key)
+        category = self._categories.get(record.name)
+        if category is not None:
+            self._remove_key(self._buckets[category], key)
+
+    @staticmethod
+    def _remove_key(ranking, key):
+        i = bisect_left(ranking, key)
+        if i < len(ranking) and ranking[i] == key:
+            del ranking[i]
@@ -0,0 +1,236 @@
+# coingecko_client.py
+
+"""
+Small CoinGecko HTTP client for CryptoBuddy.
+
+  - One pooled keep-alive requests.Session, so chat turns reuse TCP/TLS connections.
+  - Connect + read timeouts on every request (a slow upstream can’t hang the chat loop).
+  - Exponential backoff with full jitter on connection errors, timeouts, 429 and 5xx,
+    honouring the `Retry-After` header when CoinGecko sends one.
+  - Typed failures (CoinGeckoError and subclasses) instead of print-and-return-None.
+  - An optional shared rate limiter (see rate_limiter.TokenBucket) taken before
+    every HTTP attempt, retries included.
+  - An optional deadline per call: an attempt that could not finish in time
+    (token wait + connect/read timeouts) is not sent at all.
+
+`base_url` is configurable so the client can be pointed at a local stand-in server.
+"""
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Metrics
+
+DEFAULT_BASE_URL = "https://api.coingecko.com/api/v3"
+
+# ------------------------------------------------------------------------------
+#                                   ERRORS
+# ------------------------------------------------------------------------------
+
+class CoinGeckoError(Exception):
+    """Base class for every failure reported by CoinGeckoClient."""
+
+
+class CoinGeckoTimeout(CoinGeckoError):
+    """The request timed out (connect or read) on every attempt."""
+
+
+class CoinGeckoDeadlineExceeded(CoinGeckoTimeout):
+    """The request was not (re)sent: it could not finish before the caller’s deadline."""
+
+
+class CoinGeckoConnectionError(CoinGeckoError):
+    """The server could not be reached on every attempt."""
+
+
+class CoinGeckoHTTPError(CoinGeckoError):
+    """CoinGecko answered with a non-2xx status."""
+
+    def __init__(self, status_code: int, url: str, message: str = ""):
+        self.status_code = status_code
+        self.url = url
+        super().__init__(message or f"HTTP {status_code} from {url}")
+
+
+class CoinGeckoRateLimited(CoinGeckoHTTPError):
+    """CoinGecko kept answering 429 Too Many Requests."""
+
+    def __init__(self, url: str, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(429, url, f"Rate limited by {url} (Retry-After: {retry_after})")
+
+
+class CoinGeckoResponseError(CoinGeckoError):
+    """The response body was not the JSON we expected."""
+
+# ------------------------------------------------------------------------------
+#                                   CLIENT
+# ------------------------------------------------------------------------------
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Turn a Retry-After header (seconds or HTTP-date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class CoinGeckoClient:
+    """
+    Reusable CoinGecko client:
+
+      client = CoinGeckoClient()
+      doc = client.coin("bitcoin")
+      rows = client.markets(["bitcoin", "cardano"])
+
+    Every method raises a CoinGeckoError subclass when the request ultimately fails.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, max_retry_after: float = 30.0,
+                 pool_size: int = 10, session=None, rate_limiter=None,
+                 metrics=None, sleep=time.sleep):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Never wait longer than this on a single Retry-After, whatever the server says
+        self.max_retry_after = max_retry_after
+        self._sleep = sleep
+        self.rate_limiter = rate_limiter
+        # Request / JSON-decode timings and outcome counters (see metrics.py)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        if session is None:
+            session = requests.Session()
+            # We do our own retries, so the adapter must not retry on its own
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                  max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self.requests_sent = 0
+        self.retries = 0
+
+    def close(self):
+        self.session.close()
+
+    # -- endpoints --------------------------------------------------------------
+
+    def coin(self, coin_id: str):
+        """Full /coins/{id} document with market data only."""
+        return self.get_json(f"/coins/{coin_id}",
+                             params={"localization": "false",
+                                     "tickers": "false",
+                                     "market_data": "true",
+                                     "community_data": "false",
+                                     "developer_data": "false",
+                                     "sparkline": "false"},
+                             endpoint="coin")
+
+    def markets(self, coin_ids, vs_currency: str = "usd", price_change_percentage: str = None,
+                deadline: float = None):
+        """
+        One /coins/markets page for up to 250 ids. Returns the list of rows.
+        `price_change_percentage` (e.g. "1h,7d,30d") adds
+        price_change_percentage_<window>_in_currency to every row.
+        """
+        coin_ids = list(coin_ids)
+        params = {"vs_currency": vs_currency,
+                  "ids": ",".join(coin_ids),
+                  "per_page": len(coin_ids),
+                  "page": 1,
+                  "sparkline": "false"}
+        if price_change_percentage:
+            params["price_change_percentage"] = price_change_percentage
+        rows = self.get_json("/coins/markets", params=params, deadline=deadline,
+                             endpoint="markets")
+        if not isinstance(rows, list):
+            raise CoinGeckoResponseError(f"Expected a list from /coins/markets, got {type(rows).__name__}")
+        return rows
+
+    # -- transport --------------------------------------------------------------
+
+    def get_json(self, path: str, params=None, deadline: float = None, endpoint: str = None):
+        """
+        GET base_url + path with retries; return the decoded JSON body.
+        `endpoint` labels the request timings (default: the path).
+        `deadline` (a time.monotonic() value): no attempt is started – no rate
+        limiter token taken, no retry slept for – unless it can still complete,
+        timeouts included, by then; CoinGeckoDeadlineExceeded is raised instead.
+        """
+        url = self.base_url + path
+        endpoint = endpoint or path
+        attempt = 0
+        while True:
+            retry_after = None
+            if self.rate_limiter is not None:
+                wait_budget = None
+                if deadline is not None:
+                    wait_budget = deadline - time.monotonic() - sum(self.timeout)
+                with self.metrics.time("upstream_rate_limit_wait"):
+                    acquired = (wait_budget is None or wait_budget >= 0) and \
+                        self.rate_limiter.acquire(timeout=wait_budget)
+                if not acquired:
+                    raise CoinGeckoDeadlineExceeded(f"No request slot for {url} before the deadline")
+            elif deadline is not None and time.monotonic() + sum(self.timeout) > deadline:
+                raise CoinGeckoDeadlineExceeded(f"Not enough time left to fetch {url}")
+            try:
+                self.requests_sent += 1
+                with self.metrics.time("upstream_request", endpoint=endpoint):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.Timeout as e:
+                self.metrics.incr("upstream_requests_total", outcome="timeout")
+                error = CoinGeckoTimeout(f"Timed out fetching {url}: {e}")
+            except requests.ConnectionError as e:
+                self.metrics.incr("upstream_requests_total", outcome="connection_error")
+                error = CoinGeckoConnectionError(f"Could not reach {url}: {e}")
+            else:
+                status = response.status_code
+                self.metrics.incr("upstream_requests_total", outcome=str(status))
+                if status < 400:
+                    try:
+                        with self.metrics.time("upstream_json_parse"):
+                            return response.json()
+                    except ValueError as e:
+                        raise CoinGeckoResponseError(f"Invalid JSON from {url}: {e}") from e
+                if status not in RETRY_STATUSES:
+                    raise CoinGeckoHTTPError(status, url)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if status == 429:
+                    error = CoinGeckoRateLimited(url, retry_after)
+                else:
+                    error = CoinGeckoHTTPError(status, url)
+
+            if attempt >= self.max_retries:
+                raise error
+            delay = self._backoff_delay(attempt, retry_after)
+            if deadline is not None and time.monotonic() + delay + sum(self.timeout) > deadline:
+                raise error
+            self._sleep(delay)
+            attempt += 1
+            self.retries += 1
+            self.metrics.incr("upstream_retries_total")
+
+    def _backoff_delay(self, attempt: int, retry_after=None):
+        """Full-jitter exponential backoff, but never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
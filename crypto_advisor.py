@@ -1,5 +1,8 @@
 import sys
 
+from coin_entities import CoinEntityExtractor
+from coin_registry import CoinRecord, CoinRegistry
+
 # 1. Predefined crypto database
 crypto_db = {
     "Bitcoin": {
@@ -28,6 +31,19 @@ crypto_db = {
     },
 }
 
+# Ticker symbols, so “compare BTC and ADA” works too
+crypto_symbols = {"Bitcoin": "BTC", "Ethereum": "ETH", "Cardano": "ADA", "Polkadot": "DOT"}
+coin_extractor = CoinEntityExtractor.from_coins(crypto_db.keys(), crypto_symbols)
+
+# Registry with precomputed rankings over crypto_db (no max() scan per query)
+crypto_registry = CoinRegistry(
+    CoinRecord(name, name.lower(), crypto_symbols.get(name, ""),
+               energy_use=data["energy_use"],
+               sustainability_score=data["sustainability_score"])
+    for name, data in crypto_db.items())
+for name, data in crypto_db.items():
+    crypto_registry.update_market(name, data["price_trend"], data["market_cap"])
+
 # 2. Chatbot personality metadata
 BOT_NAME = "CryptoBuddy"
 BOT_TONE = "Friendly"  # e.g., “Hey there! Let’s find you a green and growing crypto!”
@@ -39,8 +55,7 @@ def greet_user():
 
 def recommend_most_sustainable():
     """Return the coin with the highest sustainability_score."""
-    recommend = max(crypto_db,
-                    key=lambda coin: crypto_db[coin]["sustainability_score"])
+    recommend = crypto_registry.top_sustainable(1)[0]
     score = crypto_db[recommend]["sustainability_score"]
     # Convert score to a 0–10 scale if stored as fraction (already 0–1 or 0–10)
     display_score = round(score * 10) if score <= 1 else round(score)
@@ -51,17 +66,10 @@ def recommend_high_profit():
     Return a coin that has price_trend='rising' AND market_cap='high'.
     If multiple, pick the one with the higher sustainability_score.
     """
-    candidates = [
-        coin for coin, data in crypto_db.items()
-        if data["price_trend"] == "rising" and data["market_cap"] == "high"
-    ]
+    candidates = crypto_registry.top_in_category("rising", "high", 1)
     if not candidates:
         return None
-
-    # If multiple, pick the one with max sustainability_score:
-    recommend = max(candidates,
-                    key=lambda coin: crypto_db[coin]["sustainability_score"])
-    return recommend
+    return candidates[0]
 
 def chatbot_response(user_query: str) -> str:
     """Generate a response based on the user_query string."""
@@ -88,10 +96,8 @@ def chatbot_response(user_query: str) -> str:
     # 3. Check if user asks “compare” or “what about X vs Y”
     elif " vs " in query or "compare" in query:
         # e.g. "compare bitcoin and cardano"
-        # Simplest implementation: parse two coin names between spaces
-        tokens = query.replace(",", "").split()
-        # find coin names in our database
-        found = [coin for coin in crypto_db.keys() if coin.lower() in tokens]
+        # find coin names/symbols in our database (typos too, if needed)
+        found = coin_extractor.extract(user_query, min_exact=2)
         if len(found) >= 2:
             c1, c2 = found[0], found[1]
             d1, d2 = crypto_db[c1], crypto_db[c2]
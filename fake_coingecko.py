@@ -0,0 +1,182 @@
+# fake_coingecko.py
+
+"""
+Local stand-in for the CoinGecko API, for load tests and benchmarks.
+
+Serves the two shapes CryptoBuddy reads:
+  GET /api/v3/coins/markets?ids=a,b,...   → list of market rows
+  GET /api/v3/coins/{id}                  → {"id": ..., "market_data": {...}}
+with deterministic (per coin id) prices, 24h changes and market caps, plus an
+optional artificial latency per request, a random error rate (answered with
+--error-status, 503 by default) and a fixed universe of coin ids (unknown ids
+get a 404 / are left out of /coins/markets, like the real API).
+
+  python fake_coingecko.py --port 8001 --latency 0.05 --error-rate 0.02 --universe 5000
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/api/v3"
+REAL_COIN_IDS = ("bitcoin", "ethereum", "cardano", "polkadot")
+
+
+def universe_ids(size: int):
+    """`size` coin ids: the four real ones CryptoBuddy ships with, then coin-0, coin-1, …"""
+    ids = list(REAL_COIN_IDS[:size])
+    ids.extend(f"coin-{i}" for i in range(max(0, size - len(REAL_COIN_IDS))))
+    return ids
+
+
+def fake_market_row(coin_id: str):
+    """Deterministic market data for `coin_id` (same id → same numbers)."""
+    seed = zlib.crc32(coin_id.encode("utf-8"))
+    return {
+        "id": coin_id,
+        "symbol": coin_id[:4],
+        "name": coin_id.title(),
+        "current_price": round(0.01 + (seed % 100_000) / 10.0, 4),
+        "market_cap": float(1_000_000_000 + (seed % 100) * 1_000_000_000),
+        "price_change_percentage_24h": ((seed >> 8) % 1000) / 100.0 - 5.0,
+        "price_change_percentage_1h_in_currency": ((seed >> 4) % 400) / 100.0 - 2.0,
+        "price_change_percentage_7d_in_currency": ((seed >> 12) % 3000) / 100.0 - 15.0,
+        "price_change_percentage_30d_in_currency": ((seed >> 16) % 6000) / 100.0 - 30.0,
+    }
+
+
+class FakeCoinGeckoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY, Nagle +
+    # delayed ACK add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            failing = server.error_rate and server.random.random() < server.error_rate
+            if failing:
+                server.error_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if failing:
+            self._send_json(server.error_status, {"error": "Injected failure"})
+            return
+
+        url = urlparse(self.path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        if path == "/coins/markets":
+            ids = [i for i in parse_qs(url.query).get("ids", [""])[0].split(",")
+                   if i and server.has_coin(i)]
+            self._send_json(200, [fake_market_row(coin_id) for coin_id in ids])
+        elif path.startswith("/coins/") and path.count("/") == 2:
+            coin_id = path.rsplit("/", 1)[1]
+            if not server.has_coin(coin_id):
+                self._send_json(404, {"error": "coin not found"})
+                return
+            row = fake_market_row(coin_id)
+            self._send_json(200, {
+                "id": row["id"],
+                "symbol": row["symbol"],
+                "name": row["name"],
+                "market_data": {
+                    "current_price": {"usd": row["current_price"]},
+                    "market_cap": {"usd": row["market_cap"]},
+                    "price_change_percentage_24h": row["price_change_percentage_24h"],
+                },
+            })
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeCoinGecko(ThreadingHTTPServer):
+    """
+    In-process fake server:
+
+      fake = FakeCoinGecko(latency=0.02).start()
+      client = CoinGeckoClient(base_url=fake.base_url)
+      ...
+      fake.stop()
+
+    `universe_size` limits the known coins to universe_ids(universe_size)
+    (None: every id exists). Failures are drawn from a seeded RNG, so a given
+    request sequence fails the same way on every run.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503,
+                 universe_size: int = None, seed: int = 0):
+        super().__init__((host, port), FakeCoinGeckoHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.universe = set(universe_ids(universe_size)) if universe_size is not None else None
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def has_coin(self, coin_id: str) -> bool:
+        return self.universe is None or coin_id in self.universe
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake CoinGecko API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds to sleep before answering each request")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--universe", type=int, default=None,
+                        help="number of known coins (default: every id exists)")
+    args = parser.parse_args()
+
+    fake = FakeCoinGecko(args.host, args.port, latency=args.latency,
+                         error_rate=args.error_rate, error_status=args.error_status,
+                         universe_size=args.universe)
+    print(f"Fake CoinGecko listening on {fake.base_url}")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server_close()
+
+
+if __name__ == "__main__":
+    main()
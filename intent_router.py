@@ -0,0 +1,130 @@
+# intent_router.py
+
+"""
+Precompiled intent router for CryptoBuddy.
+
+Intents are registered once with the stems (single words) and phrases (word
+sequences) that trigger them. Registration builds a dict index
+
+    stem → intents it triggers      (single-stem keywords)
+    last stem of phrase → phrases   (multi-stem keywords)
+
+so classifying a query is one pass over its stems with dict lookups, however
+many intents exist. When several intents match, the one registered first wins
+(the same precedence the old if-chain had). An intent’s `weak_stems` only
+count when no other intent’s stems or phrases match.
+
+  router = IntentRouter()
+
+  @router.intent("sustainability", stems=["sustain", "eco", "green"])
+  def answer_sustainability(user_query, stems):
+      ...
+
+  name, handler = router.route(stems)
+"""
+
+
+class Intent:
+    __slots__ = ("name", "handler", "priority")
+
+    def __init__(self, name: str, handler, priority: int):
+        self.name = name
+        self.handler = handler
+        self.priority = priority
+
+    def __repr__(self):
+        return f"Intent({self.name!r}, priority={self.priority})"
+
+
+WEAK_PRIORITY = 1 << 20       # added to the priority of weak-stem matches
+
+
+class IntentRouter:
+    def __init__(self):
+        self._intents = {}
+        self._stem_index = {}     # stem -> best (lowest priority) Intent for that stem
+        self._phrase_index = {}   # last stem -> [(phrase tuple, Intent), ...]
+        self.fallback = None      # handler used when nothing matches
+
+    def register(self, name: str, handler, stems=(), phrases=(), weak_stems=()):
+        """
+        Register `handler(user_query, stems) -> str` under `name`.
+        `stems` are single stems; `phrases` are sequences of stems that must
+        appear consecutively (e.g. ("long", "term")); `weak_stems` trigger the
+        intent only if nothing else matches (e.g. "week" for trend questions,
+        which shouldn’t turn “compare X vs Y this week” into one).
+        """
+        if name in self._intents:
+            raise ValueError(f"Intent {name!r} is already registered")
+        intent = Intent(name, handler, priority=len(self._intents))
+        self._intents[name] = intent
+        for stem in stems:
+            self._index_stem(stem, intent)
+        for phrase in phrases:
+            phrase = tuple(phrase)
+            if len(phrase) == 1:
+                self._index_stem(phrase[0], intent)
+            elif phrase:
+                self._phrase_index.setdefault(phrase[-1], []).append((phrase, intent))
+        if weak_stems:
+            weak = Intent(name, handler, priority=WEAK_PRIORITY + intent.priority)
+            for stem in weak_stems:
+                self._index_stem(stem, weak)
+        return intent
+
+    def _index_stem(self, stem: str, intent: Intent):
+        current = self._stem_index.get(stem)
+        if current is None or intent.priority < current.priority:
+            self._stem_index[stem] = intent
+
+    def intent(self, name: str, stems=(), phrases=(), weak_stems=()):
+        """Decorator form of register()."""
+        def decorator(handler):
+            self.register(name, handler, stems=stems, phrases=phrases, weak_stems=weak_stems)
+            return handler
+        return decorator
+
+    def set_fallback(self, handler):
+        """Decorator/setter for the handler used when no intent matches."""
+        self.fallback = handler
+        return handler
+
+    def classify(self, stems):
+        """Return the matching Intent with the highest precedence, or None."""
+        best = None
+        stem_index = self._stem_index
+        phrase_index = self._phrase_index
+        for i, stem in enumerate(stems):
+            intent = stem_index.get(stem)
+            if intent is not None and (best is None or intent.priority < best.priority):
+                best = intent
+                if best.priority == 0:
+                    break
+            phrases = phrase_index.get(stem)
+            if phrases:
+                for phrase, intent in phrases:
+                    n = len(phrase)
+                    if (i + 1 >= n and (best is None or intent.priority < best.priority)
+                            and tuple(stems[i + 1 - n:i + 1]) == phrase):
+                        best = intent
+        return best
+
+    def route(self, stems):
+        """(intent name, handler) for these stems; ("fallback", fallback) if none match."""
+        intent = self.classify(stems)
+        if intent is None:
+            return "fallback", self.fallback
+        return intent.name, intent.handler
+
+    def handler_for(self, name: str):
+        """Handler registered under `name` (the fallback for "fallback")."""
+        if name == "fallback":
+            return self.fallback
+        return self._intents[name].handler
+
+    @property
+    def intents(self):
+        return list(self._intents)
+
+    def __len__(self):
+        return len(self._intents)
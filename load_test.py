@@ -0,0 +1,132 @@
+# load_test.py
+
+"""
+Load-test client for chat_server.py.
+
+By default it starts everything locally: a fake CoinGecko (fake_coingecko.py),
+a ChatServer pointed at it, and then `--clients` concurrent users, each with its
+own session, sending a mix of typical questions. It reports requests/sec and
+p50/p99 latency.
+
+  python load_test.py --clients 32 --requests 200
+  python load_test.py --url http://127.0.0.1:8000     # against a running server
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+QUERY_MIX = [
+    "Which crypto is trending up?",
+    "What’s the most sustainable coin?",
+    "Compare Bitcoin vs Cardano",
+    "Compare Ethereum vs Polkadot",
+    "List all coins",
+    "help",
+    "Which coin is best for long-term profit?",
+    "Hey, best",
+]
+
+
+def percentile(sorted_values, pct: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def run_client(host: str, port: int, n_requests: int, offset: int, latencies, errors):
+    """One simulated user: a persistent connection and its own session."""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    session_id = None
+    for i in range(n_requests):
+        body = {"message": QUERY_MIX[(offset + i) % len(QUERY_MIX)]}
+        if session_id:
+            body["session_id"] = session_id
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/chat", body=json.dumps(body),
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            payload = json.loads(response.read())
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+            session_id = payload["session_id"]
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            errors.append(repr(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_load(url: str, clients: int, requests_per_client: int):
+    parsed = urlparse(url)
+    latencies, errors = [], []
+    threads = [threading.Thread(target=run_client,
+                                args=(parsed.hostname, parsed.port or 80,
+                                      requests_per_client, n, latencies, errors))
+               for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the CryptoBuddy chat server")
+    parser.add_argument("--url", default=None,
+                        help="existing chat server; if omitted one is started locally")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="requests per client")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="workers for the local server (default: one per client, as "
+                             "each keep-alive client holds a worker)")
+    parser.add_argument("--upstream-latency", type=float, default=0.05,
+                        help="latency of the local fake CoinGecko, in seconds")
+    args = parser.parse_args()
+
+    fake = server = None
+    url = args.url
+    if url is None:
+        import chat_server
+        import smart_crypto
+        from fake_coingecko import FakeCoinGecko
+
+        fake = FakeCoinGecko(latency=args.upstream_latency).start()
+        smart_crypto.use_coingecko(fake.base_url, persist=False)
+        server = chat_server.start_server(port=0, workers=args.workers or args.clients)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        report = run_load(url, args.clients, args.requests)
+        if fake is not None:
+            report["upstream_requests"] = fake.request_count
+        print(json.dumps(report, indent=2))
+    finally:
+        if server is not None:
+            server.graceful_shutdown()
+        if fake is not None:
+            fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# market_snapshot.py
+
+"""
+Immutable market snapshots + a background refresher for CryptoBuddy.
+
+A MarketSnapshot holds the market fields of every tracked coin at one moment,
+together with a version number and the time it was taken. The
+SnapshotRefresher rebuilds it on a fixed interval in a daemon thread, so chat
+turns only read the current snapshot and never wait on CoinGecko (except for
+the very first snapshot of the process).
+
+With a SnapshotStore (snapshot_store.py) the refresher also starts warm from
+the last snapshot on disk and shares refreshes with other processes.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+
+class MarketSnapshot:
+    """
+    Read-only view of the market at one point in time:
+      snapshot.version     – increases by one on every successful refresh
+      snapshot.created_at  – wall-clock time (time.time()) the data was fetched
+      snapshot.coins       – {coin_id: {"price_change_24h": ..., "market_cap_usd": ...}}
+    """
+
+    __slots__ = ("version", "created_at", "coins")
+
+    def __init__(self, version: int, created_at: float, coins: dict):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "created_at", created_at)
+        object.__setattr__(self, "coins", MappingProxyType(
+            {coin_id: MappingProxyType(dict(fields)) for coin_id, fields in coins.items()}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MarketSnapshot is immutable")
+
+    def age(self, now: float = None) -> float:
+        """Seconds since this snapshot’s data was fetched."""
+        return max(0.0, (time.time() if now is None else now) - self.created_at)
+
+    def get(self, coin_id: str):
+        return self.coins.get(coin_id)
+
+    def __reduce__(self):
+        # Picklable (e.g. to hand one snapshot to worker processes)
+        return (MarketSnapshot, (self.version, self.created_at,
+                                 {coin_id: dict(fields) for coin_id, fields in self.coins.items()}))
+
+    def __repr__(self):
+        return f"MarketSnapshot(version={self.version}, coins={len(self.coins)}, age={self.age():.1f}s)"
+
+
+class SnapshotRefresher:
+    """
+    Rebuilds the market snapshot every `interval` seconds in a background thread.
+
+      refresher = SnapshotRefresher(fetch_all, interval=30)
+      refresher.start()
+      snapshot = refresher.current()
+
+    `fetch_all()` returns {coin_id: fields}. If it raises, or returns nothing,
+    the previous snapshot stays current. Coins missing from a partial result
+    keep their previous values.
+
+    With `store`, a stored snapshot is only ever served when it is at most
+    `max_age` seconds old: the first snapshot is loaded from disk (and served
+    while the background thread refreshes), every new snapshot is saved, and a
+    background refresh adopts a snapshot another process saved less than
+    `interval` seconds ago instead of fetching.
+
+    Processes that never call start() (scripts, notebooks, tests) can call
+    start_if_stale() on each read: the thread then starts once the snapshot is
+    older than `interval`, instead of that snapshot being served forever.
+
+    While there is no snapshot at all, get_or_refresh() fetches synchronously,
+    but not again within `retry_after` seconds of a failed fetch: during an
+    outage callers get None right away instead of each waiting for upstream.
+    """
+
+    def __init__(self, fetch_all, interval: float = 30.0, store=None,
+                 max_age: float = 3600.0, retry_after: float = 10.0):
+        self.fetch_all = fetch_all
+        self.interval = interval
+        self.store = store
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self._failed_at = None                # monotonic time of the last failed fetch
+        self._snapshot = None
+        self._warm_started = store is None
+        self._lock = threading.Lock()         # guards _snapshot
+        self._refresh_lock = threading.Lock() # one refresh at a time
+        self._warm_lock = threading.Lock()    # one store load at start-up
+        self._start_lock = threading.Lock()   # one background thread
+        self._stop = threading.Event()
+        self._thread = None
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.adopted_count = 0                # snapshots taken from the store instead
+        self._listeners = []
+
+    @classmethod
+    def frozen(cls, snapshot):
+        """A refresher that always serves `snapshot` and never fetches (batch workers)."""
+        refresher = cls(lambda: None, interval=float("inf"))
+        refresher._snapshot = snapshot
+        return refresher
+
+    def set_store(self, store):
+        """Use another store (or None); only before the first snapshot is served."""
+        self.store = store
+        self._warm_started = store is None
+
+    def subscribe(self, callback):
+        """Call `callback(snapshot)` for every snapshot published from now on."""
+        self._listeners.append(callback)
+        return callback
+
+    def current(self):
+        """The latest snapshot, or None if none has been built yet."""
+        if not self._warm_started:
+            self._warm_start()
+        return self._snapshot
+
+    def get_or_refresh(self):
+        """The latest snapshot; builds the first one synchronously if needed."""
+        snapshot = self.current()
+        if snapshot is None and not self._backing_off():
+            with self._refresh_lock:
+                # Callers queued behind a failed fetch don’t repeat it
+                snapshot = self._snapshot
+                if snapshot is None and not self._backing_off():
+                    snapshot = self._refresh_locked(adopt_within=self.interval)
+        return snapshot
+
+    def _backing_off(self):
+        failed_at = self._failed_at
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_after
+
+    def refresh_now(self):
+        """Fetch fresh data and publish a new snapshot. Returns the current snapshot."""
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def start(self):
+        """Start the background thread (no-op if it is already running)."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            # Load the stored snapshot first, so it is served while the thread fetches
+            self.current()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="market-snapshot-refresher",
+                                            daemon=True)
+            self._thread.start()
+
+    def start_if_stale(self, snapshot):
+        """
+        start() if `snapshot` is older than `interval` and the thread was never
+        started. Not after stop(), and never for frozen() (infinite interval).
+        """
+        if (self._thread is None and not self._stop.is_set()
+                and snapshot.age() > self.interval):
+            self.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._refresh_lock:
+                self._refresh_locked(adopt_within=self.interval)
+            self._stop.wait(self.interval)
+
+    def _warm_start(self):
+        # Not under _refresh_lock: a background refresh can hold that for a whole
+        # upstream fetch, and the stored snapshot is meant to be served meanwhile
+        with self._warm_lock:
+            if self._warm_started:
+                return
+            stored = self.store.load()
+            if stored is not None and stored.age() <= self.max_age:
+                self._publish(stored)
+            self._warm_started = True
+
+    def _publish(self, snapshot):
+        with self._lock:
+            if self._snapshot is not None and snapshot.version <= self._snapshot.version:
+                return
+            self._snapshot = snapshot
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Snapshot listener {callback.__name__} failed: {e}")
+
+    def _refresh_locked(self, adopt_within: float = None):
+        if self.store is None:
+            return self._fetch(self._snapshot)
+        with self.store.locked():
+            # Another process may have refreshed while we waited for the lock
+            stored = self.store.load()
+            previous = self._snapshot
+            if (stored is not None and stored.age() <= self.max_age
+                    and (previous is None or stored.version > previous.version)):
+                self._publish(stored)
+                self.adopted_count += 1
+                previous = stored
+            if (previous is not None and adopt_within is not None
+                    and previous.age() < adopt_within):
+                return previous
+            snapshot = self._fetch(previous)
+            if snapshot is not previous:
+                self.store.save(snapshot)
+            return snapshot
+
+    def _fetch(self, previous):
+        try:
+            coins = self.fetch_all()
+        except Exception as e:
+            print(f"Market snapshot refresh failed: {e}")
+            coins = None
+        if not coins:
+            self.failure_count += 1
+            self._failed_at = time.monotonic()
+            return previous
+        self._failed_at = None
+
+        if previous is not None:
+            merged = dict(previous.coins)
+            merged.update(coins)
+            coins = merged
+        snapshot = MarketSnapshot(version=(previous.version + 1) if previous else 1,
+                                  created_at=time.time(), coins=coins)
+        self._publish(snapshot)
+        self.refresh_count += 1
+        return snapshot
@@ -0,0 +1,249 @@
+# metrics.py
+
+"""
+Lightweight instrumentation for CryptoBuddy.
+
+  metrics = Metrics(enabled=True)
+  with metrics.time("tokenize"):
+      tokens = tokenize(text)
+  metrics.incr("responses_total", intent="trend")
+  print(metrics.prometheus())       # Prometheus text exposition format
+  print(metrics.summary())          # short human-readable table (`stats` command)
+
+Stage timings go into fixed log-spaced histograms (each bucket 20% wider than
+the previous one, 1µs … ~2min), so recording is a bisect + two increments and
+p50/p95/p99 are read from the buckets (within one bucket width, ≤ 20%).
+
+When disabled, time() returns a shared no-op context manager and incr() /
+observe() return immediately, so instrumented code costs about one method call
+per stage.
+
+Optionally, a random `profile_sample_rate` fraction of the calls wrapped in
+profiled() run under cProfile; their stats are accumulated and can be printed
+with profile_report() or saved with dump_profile().
+"""
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+BUCKET_GROWTH = 1.2
+BUCKET_BOUNDS = [1e-6 * BUCKET_GROWTH ** i for i in range(104)]   # seconds, up to ~150s
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Counts of observations (in seconds) per log-spaced bucket."""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)   # last bucket: above the top bound
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (0 if empty)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return BUCKET_BOUNDS[min(i, len(BUCKET_BOUNDS) - 1)]
+        return BUCKET_BOUNDS[-1]
+
+
+class _Timer:
+    __slots__ = ("metrics", "key", "start")
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._observe(self.key, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Thread-safe per-stage histograms and counters, with labels."""
+
+    def __init__(self, enabled: bool = False, prefix: str = "cryptobuddy",
+                 profile_sample_rate: float = 0.0):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.profile_sample_rate = profile_sample_rate
+        self._histograms = {}     # (stage, labels) -> Histogram
+        self._counters = {}       # (name, labels) -> int
+        self._gauges = []         # callables returning {(name, labels): value}
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()   # one cProfile run at a time
+        self._profile_stats = None
+        self.profiled_calls = 0
+
+    # -- recording -----------------------------------------------------------------
+
+    def time(self, stage: str, **labels):
+        """Context manager recording the duration of the block under `stage`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, (stage, tuple(sorted(labels.items()))))
+
+    def observe(self, stage: str, seconds: float, **labels):
+        if self.enabled:
+            self._observe((stage, tuple(sorted(labels.items()))), seconds)
+
+    def incr(self, name: str, n: int = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def add_gauges(self, collect):
+        """Register `collect() -> {(name, labels tuple): value}`, read at export time."""
+        self._gauges.append(collect)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def _observe(self, key, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    # -- profiling -----------------------------------------------------------------
+
+    @contextmanager
+    def profiled(self):
+        """Run the block under cProfile for a sampled fraction of calls."""
+        if (not self.profile_sample_rate or random.random() >= self.profile_sample_rate
+                or not self._profile_lock.acquire(blocking=False)):
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+            if self._profile_stats is None:
+                self._profile_stats = pstats.Stats(profiler)
+            else:
+                self._profile_stats.add(profiler)
+            self.profiled_calls += 1
+        finally:
+            self._profile_lock.release()
+
+    def profile_report(self, limit: int = 20) -> str:
+        """Top functions by cumulative time over all profiled calls."""
+        with self._profile_lock:
+            if self._profile_stats is None:
+                return "No profiled calls yet."
+            out = io.StringIO()
+            self._profile_stats.stream = out
+            self._profile_stats.sort_stats("cumulative").print_stats(limit)
+            return out.getvalue()
+
+    def dump_profile(self, path: str) -> bool:
+        """Save the accumulated profile (open with `python -m pstats path`)."""
+        with self._profile_lock:
+            if self._profile_stats is None:
+                return False
+            self._profile_stats.dump_stats(path)
+            return True
+
+    # -- export --------------------------------------------------------------------
+
+    def snapshot(self):
+        """({stage key: (count, sum, {q: seconds})}, {counter key: value})."""
+        with self._lock:
+            histograms = {key: (h.count, h.total, {q: h.quantile(q) for q in QUANTILES})
+                          for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        for collect in self._gauges:
+            counters.update(collect())
+        return histograms, counters
+
+    def prometheus(self) -> str:
+        """Prometheus text format: one summary per stage + counters/gauges."""
+        histograms, counters = self.snapshot()
+        lines = []
+        name = f"{self.prefix}_stage_seconds"
+        if histograms:
+            lines.append(f"# HELP {name} Time spent per stage.")
+            lines.append(f"# TYPE {name} summary")
+        for (stage, labels), (count, total, quantiles) in sorted(histograms.items()):
+            base = (("stage", stage),) + labels
+            for q, seconds in quantiles.items():
+                lines.append(f"{name}{_labels(base + (('quantile', q),))} {seconds:.6g}")
+            lines.append(f"{name}_sum{_labels(base)} {total:.6g}")
+            lines.append(f"{name}_count{_labels(base)} {count}")
+        typed = set()
+        for (counter, labels), value in sorted(counters.items()):
+            metric = f"{self.prefix}_{counter}"
+            if metric not in typed:
+                typed.add(metric)
+                kind = "counter" if counter.endswith("_total") else "gauge"
+                lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Fixed-width table of the stage timings (ms) and counters."""
+        if not self.enabled:
+            return "Metrics are disabled (set CRYPTOBUDDY_METRICS=1)."
+        histograms, counters = self.snapshot()
+        rows = [f"{'stage':<32}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)"]
+        for (stage, labels), (count, _, quantiles) in sorted(histograms.items()):
+            label = stage + "".join(f" {k}={v}" for k, v in labels)
+            p50, p95, p99 = (quantiles[q] * 1000 for q in QUANTILES)
+            rows.append(f"{label:<32}{count:>8}{p50:>9.3f}{p95:>9.3f}{p99:>9.3f}")
+        for (counter, labels), value in sorted(counters.items()):
+            label = counter + "".join(f" {k}={v}" for k, v in labels)
+            rows.append(f"{label:<40}{value:>10}")
+        return "\n".join(rows)
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,234 @@
+# price_history.py
+
+"""
+In-memory price history for CryptoBuddy: rolling 1h / 24h / 7d / 30d windows.
+
+Every snapshot refresh adds one price tick per coin. For each window a coin
+keeps a small fixed-size ring buffer (array-backed, HISTORY_POINTS slots of
+window/HISTORY_POINTS seconds each, the last tick of a slot wins) and running
+sums, so each tick updates, in O(1):
+
+  - the rolling return over the window (last price vs the oldest slot),
+  - the moving average of the slot prices,
+  - the volatility (standard deviation of slot-to-slot log returns).
+
+Sums are recomputed from the buffer every few thousand ticks to stop
+floating-point drift (amortized O(1)).
+
+A coin seen for the first time can be seeded with anchor prices derived from
+CoinGecko’s 1h / 24h / 7d / 30d % changes (returned by the same /coins/markets
+call), so every window has a return from the first refresh on. The oldest
+entry is only dropped once the next one reaches a full window back, so the
+anchor stays until real ticks cover the window, and change_pct measures over
+exactly one window (interpolating the price one span back).
+
+  history = PriceHistory()
+  history.record("bitcoin", time.time(), 64000.0, anchors={"7d": -2.5})
+  history.stats("bitcoin", "7d")  → {"change_pct": ..., "moving_average": ..., ...}
+"""
+import math
+import threading
+from array import array
+
+WINDOWS = {"1h": 3600.0, "24h": 86_400.0, "7d": 7 * 86_400.0, "30d": 30 * 86_400.0}
+HISTORY_POINTS = 32           # slots per window (1h: ~2min slots, 30d: ~22h)
+RESYNC_EVERY = 4096           # ticks between exact recomputations of the sums
+
+
+class RollingWindow:
+    """Ring buffer of (slot, price) covering the last `span` seconds."""
+
+    __slots__ = ("span", "resolution", "capacity", "_slots", "_prices", "_head", "_count",
+                 "_sum", "_ret_sum", "_ret_sq", "_ticks", "_anchored")
+
+    def __init__(self, span: float, points: int = HISTORY_POINTS):
+        self.span = span
+        self.resolution = span / points
+        self.capacity = points + 1              # the oldest slot is a full span back
+        self._slots = array("i", bytes(4 * self.capacity))   # slot = timestamp // resolution
+        self._prices = array("d", bytes(8 * self.capacity))
+        self._head = 0                          # index of the oldest entry
+        self._count = 0
+        self._sum = 0.0                         # sum of prices
+        self._ret_sum = 0.0                     # sum of log returns between entries
+        self._ret_sq = 0.0                      # sum of squared log returns
+        self._ticks = 0
+        self._anchored = False                  # oldest entry is a seeded anchor
+
+    def __len__(self):
+        return self._count
+
+    def _index(self, i: int) -> int:
+        return (self._head + i) % self.capacity
+
+    def add(self, timestamp: float, price: float, anchor: bool = False):
+        """
+        Record a price; ticks older than the newest slot are ignored. An
+        `anchor` (a price derived from a % change, into an empty window) counts
+        for the return but not for the volatility.
+        """
+        if not price > 0:
+            return
+        if anchor and not self._count:
+            self._anchored = True
+        slot = int(timestamp // self.resolution)
+        prices = self._prices
+        if self._count:
+            last = self._index(self._count - 1)
+            last_slot = self._slots[last]
+            if slot < last_slot:
+                return
+            if slot == last_slot:
+                # Same slot: the newer tick replaces the slot’s close price
+                old = prices[last]
+                self._sum += price - old
+                if self._count >= 2:
+                    prev = prices[self._index(self._count - 2)]
+                    self._replace_return(math.log(old / prev), math.log(price / prev))
+                prices[last] = price
+                return
+            # Drop the oldest entry once the next one already reaches a full
+            # window back (so a seeded anchor stays until real ticks cover the
+            # window); a full ring always satisfies this
+            while self._count >= 2 and self._slots[self._index(1)] <= slot - (self.capacity - 1):
+                self._pop_oldest()
+        if self._count:
+            r = math.log(price / prices[self._index(self._count - 1)])
+            self._ret_sum += r
+            self._ret_sq += r * r
+        i = self._index(self._count)
+        self._slots[i] = slot
+        prices[i] = price
+        self._count += 1
+        self._sum += price
+        self._ticks += 1
+        if self._ticks >= RESYNC_EVERY:
+            self._resync()
+
+    def _pop_oldest(self):
+        prices = self._prices
+        oldest = prices[self._head]
+        self._sum -= oldest
+        if self._count >= 2:
+            r = math.log(prices[self._index(1)] / oldest)
+            self._ret_sum -= r
+            self._ret_sq -= r * r
+        self._head = (self._head + 1) % self.capacity
+        self._count -= 1
+        self._anchored = False
+
+    def _replace_return(self, old_r: float, new_r: float):
+        self._ret_sum += new_r - old_r
+        self._ret_sq += new_r * new_r - old_r * old_r
+
+    def _resync(self):
+        values = [self._prices[self._index(i)] for i in range(self._count)]
+        returns = [math.log(b / a) for a, b in zip(values, values[1:])]
+        self._sum = math.fsum(values)
+        self._ret_sum = math.fsum(returns)
+        self._ret_sq = math.fsum(r * r for r in returns)
+        self._ticks = 0
+
+    # -- statistics, all O(1) --------------------------------------------------------
+
+    def change_pct(self):
+        """
+        % change over one window span up to the latest price, or None. The
+        oldest entry may lie further back; the price one span back is then
+        interpolated between it and the next entry.
+        """
+        if self._count < 2:
+            return None
+        prices, slots = self._prices, self._slots
+        last_i = self._index(self._count - 1)
+        first = prices[self._head]
+        start = slots[last_i] - (self.capacity - 1)
+        if self._count >= 3 and slots[self._head] < start:
+            second_i = self._index(1)
+            s0, s1 = slots[self._head], slots[second_i]
+            first += (prices[second_i] - first) * (start - s0) / (s1 - s0)
+        return (prices[last_i] / first - 1.0) * 100.0
+
+    def moving_average(self):
+        return self._sum / self._count if self._count else None
+
+    def volatility_pct(self):
+        """Sample std-dev of slot-to-slot log returns, in %, or None (< 2 returns)."""
+        n = self._count - 1
+        ret_sum, ret_sq = self._ret_sum, self._ret_sq
+        if self._anchored:
+            # Leave out the jump from the anchor to the first real tick
+            r = math.log(self._prices[self._index(1)] / self._prices[self._head])
+            n, ret_sum, ret_sq = n - 1, ret_sum - r, ret_sq - r * r
+        if n < 2:
+            return None
+        variance = (ret_sq - ret_sum * ret_sum / n) / (n - 1)
+        return math.sqrt(max(0.0, variance)) * 100.0
+
+    def coverage(self):
+        """Fraction of the window spanned by the recorded slots (0 … 1)."""
+        if self._count < 2:
+            return 0.0
+        first = self._slots[self._head]
+        last = self._slots[self._index(self._count - 1)]
+        return min(1.0, (last - first) * self.resolution / self.span)
+
+
+class PriceHistory:
+    """Thread-safe {coin_id: {window name: RollingWindow}}."""
+
+    def __init__(self, windows=None, points: int = HISTORY_POINTS):
+        self.windows = dict(windows or WINDOWS)
+        self.points = points
+        self._series = {}
+        self._last_seen = {}      # coin_id -> timestamp of its latest tick
+        self._lock = threading.Lock()
+        self.ticks = 0
+
+    def record(self, coin_id: str, timestamp: float, price: float, anchors=None):
+        """
+        Add one price tick. `anchors` ({window name: % change over that window})
+        seed a new coin with the price one window back; they are ignored once
+        the coin has history. A tick no newer than the coin’s latest one (a
+        price carried over from an earlier fetch) is ignored.
+        """
+        if price is None or not price > 0:
+            return
+        with self._lock:
+            last = self._last_seen.get(coin_id)
+            if last is not None and timestamp <= last:
+                return
+            self._last_seen[coin_id] = timestamp
+            series = self._series.get(coin_id)
+            if series is None:
+                series = self._series[coin_id] = {
+                    name: RollingWindow(span, self.points) for name, span in self.windows.items()}
+                for name, pct in (anchors or {}).items():
+                    window = series.get(name)
+                    if window is not None and pct is not None and pct > -100.0:
+                        window.add(timestamp - window.span, price / (1.0 + pct / 100.0),
+                                   anchor=True)
+            for window in series.values():
+                window.add(timestamp, price)
+            self.ticks += 1
+
+    def stats(self, coin_id: str, window: str):
+        """change_pct / moving_average / volatility_pct / points / coverage, or None."""
+        with self._lock:
+            series = self._series.get(coin_id)
+            if series is None or window not in series:
+                return None
+            w = series[window]
+            if len(w) < 2:
+                return None
+            return {"change_pct": w.change_pct(),
+                    "moving_average": w.moving_average(),
+                    "volatility_pct": w.volatility_pct(),
+                    "points": len(w),
+                    "coverage": w.coverage()}
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, coin_id):
+        return coin_id in self._series
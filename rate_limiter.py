@@ -0,0 +1,76 @@
+# rate_limiter.py
+
+"""
+Thread-safe token-bucket rate limiter for CryptoBuddy’s CoinGecko calls.
+
+The bucket holds up to `burst` tokens and refills at `rate` tokens per second.
+Every upstream request takes one token; if none is left the caller sleeps just
+long enough for its token to arrive. Replies that never call CoinGecko are
+never delayed, and one bucket can be shared by every thread and chat session
+of the process.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+      bucket = TokenBucket(rate=0.5, burst=5)   # ~30 requests/minute, bursts of 5
+      bucket.acquire()                          # blocks until a token is available
+
+    Waiting callers reserve their token up front (the level may go negative),
+    so concurrent callers are served in arrival order without busy-looping.
+    """
+
+    def __init__(self, rate: float, burst: int = 1,
+                 clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        # Metrics
+        self.acquired = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rejected = 0
+
+    def acquire(self, tokens: float = 1, timeout: float = None) -> bool:
+        """
+        Take `tokens` from the bucket, sleeping if necessary.
+        Returns False (without taking anything) if the wait would exceed `timeout`.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                self.rejected += 1
+                return False
+            self._tokens -= tokens
+            self.acquired += 1
+            if wait > 0:
+                self.waits += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+        if wait > 0:
+            self._sleep(wait)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate,
+                    "burst": self.burst,
+                    "acquired": self.acquired,
+                    "waits": self.waits,
+                    "total_wait_seconds": self.total_wait,
+                    "max_wait_seconds": self.max_wait,
+                    "rejected": self.rejected}
@@ -0,0 +1,100 @@
+# response_cache.py
+
+"""
+Reply cache for CryptoBuddy's chatbot_response.
+
+Replies are keyed by what actually determines them — the intent, the coins
+the query mentions and, for intents that read market data, the snapshot
+version — so “Which crypto is trending up?” is tokenized, routed, recommended
+and formatted once per snapshot instead of once per user.
+
+  - bounded size with LRU eviction;
+  - entries tagged with a snapshot version are dropped as soon as a newer
+    version is seen (they could never be hit again anyway);
+  - pinned entries (static replies such as help / list) are never evicted.
+"""
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of reply strings.
+
+      cache = ResponseCache(max_entries=1024)
+      reply = cache.get(("trend", (), 7))
+      if reply is None:
+          reply = cache.put(("trend", (), 7), render(), version=7)
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (version, value)
+        self._pinned = {}               # key -> value, never evicted
+        self._version = None            # newest snapshot version seen
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Cached value for `key`, or None."""
+        with self._lock:
+            value = self._pinned.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, version=None):
+        """
+        Store `value` under `key` and return it. `version` tags entries built
+        from a market snapshot; storing a newer version drops the older ones.
+        """
+        with self._lock:
+            if version is not None and version != self._version:
+                if self._version is not None and version < self._version:
+                    return value          # built from an outdated snapshot
+                self._drop_versioned()
+                self._version = version
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def pin(self, key, value):
+        """Store a static reply that is always served from the cache."""
+        with self._lock:
+            self._pinned[key] = value
+            self._entries.pop(key, None)
+        return value
+
+    def clear(self):
+        """Forget every entry, pinned ones included (e.g. the coin universe changed)."""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "pinned": len(self._pinned),
+                    "hits": self.hits,
+                    "misses": self.misses}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries) + len(self._pinned)
+
+    def _drop_versioned(self):
+        for key in [k for k, (v, _) in self._entries.items() if v is not None]:
+            del self._entries[key]
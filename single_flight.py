@@ -0,0 +1,69 @@
+# single_flight.py
+
+"""
+Request coalescing (“single-flight”) for CryptoBuddy’s upstream fetches.
+
+When several threads ask for the same key at the same moment (e.g. many chat
+sessions asking about Bitcoin right after its cache entry expired), only the
+first one – the leader – runs the fetch; the others wait for it and receive
+the same result, or the same exception. Once the call finishes the key is
+forgotten, so the next caller fetches again: this collapses concurrent calls
+only, it is not a cache.
+
+  flight = SingleFlight()
+  data = flight.do(("coin", "bitcoin"), lambda: coingecko.coin("bitcoin"))
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe; `calls` counts fetches actually run, `collapsed` the callers that shared one."""
+
+    def __init__(self):
+        self._calls = {}          # key -> _Call in flight
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key, fn):
+        """Return fn(), shared with every concurrent do() for the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "collapsed": self.collapsed,
+                    "in_flight": len(self._calls)}
@@ -9,26 +9,30 @@ Stretch Goals implemented:
   
   
 """
-import nltk
-
-# ---------------------------------------------------------
-# Check for ‘punkt’ and download it if it’s not already there
-# ---------------------------------------------------------
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    print("NLTK ‘punkt’ not found. Downloading…")
-    nltk.download('punkt')
-
-# ---------------------------------------------------------
-# (the rest of your imports and code follow)
-# ---------------------------------------------------------
+import time
+_IMPORT_STARTED = time.perf_counter()
 
+import functools
+import hashlib
+import os
+import re
 import sys
-import time
-import requests
-from nltk.tokenize import word_tokenize
-from nltk.stem.porter import PorterStemmer
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from coin_columns import HAS_NUMPY, ColumnarCoinStore
+from coin_entities import CoinEntityExtractor
+from coin_registry import CoinRecord, CoinRegistry
+from coingecko_client import (CoinGeckoClient, CoinGeckoDeadlineExceeded, CoinGeckoTimeout,
+                              DEFAULT_BASE_URL)
+from intent_router import IntentRouter
+from market_snapshot import SnapshotRefresher
+from metrics import Metrics
+from price_history import PriceHistory
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from snapshot_store import SnapshotStore
 
 # ------------------------------------------------------------------------------
 # 0. Instructions / Dependencies:
@@ -37,9 +41,12 @@ from nltk.stem.porter import PorterStemmer
 # 2) Install required packages:
 #      pip install requests nltk
 #
-# 3) Before running for the first time, you’ll need NLTK’s 'punkt' model:
+# 3) NLTK is only imported on the first query that needs it. With the default
+#    "nltk" tokenizer its 'punkt' model is downloaded then if missing:
 #      >>> import nltk
 #      >>> nltk.download('punkt')
+#    Set CRYPTOBUDDY_TOKENIZER=simple to use the built-in tokenizer instead
+#    (no punkt data, no download).
 #
 # 4) Run the chatbot:
 #      python crypto_advisor.py
@@ -58,8 +65,61 @@ from nltk.stem.porter import PorterStemmer
 BOT_NAME = "CryptoBuddy"
 BOT_TONE = "Friendly"
 
-# 2. NLTK Stemmer setup
-stemmer = PorterStemmer()
+#    Instrumentation (see metrics.py): per-stage timings (tokenize, stem, route,
+#    upstream request, JSON parse, …) and counters, exported as Prometheus text
+#    by the chat server’s /metrics and shown by the hidden `stats` chat command.
+#    Off by default (near-zero cost); CRYPTOBUDDY_METRICS=1 turns it on, and
+#    CRYPTOBUDDY_PROFILE_RATE=0.01 additionally runs 1% of replies under cProfile.
+METRICS_ENABLED = os.environ.get("CRYPTOBUDDY_METRICS", "") not in ("", "0", "false")
+PROFILE_SAMPLE_RATE = float(os.environ.get("CRYPTOBUDDY_PROFILE_RATE", "0") or 0)
+metrics = Metrics(enabled=METRICS_ENABLED, profile_sample_rate=PROFILE_SAMPLE_RATE)
+
+# 2. NLP setup (lazy)
+#    Importing this module does not import NLTK or touch the network; the
+#    tokenizer and stemmer are loaded by the first normalize_query() call.
+#      "nltk"   – nltk.word_tokenize (needs the ‘punkt’ model)
+#      "simple" – built-in regex tokenizer, no NLTK data needed
+TOKENIZER = os.environ.get("CRYPTOBUDDY_TOKENIZER", "nltk")
+#    Stems of recently seen tokens are memoized (users repeat the same words)
+STEM_CACHE_SIZE = 4096
+
+_SIMPLE_TOKEN_RE = re.compile(r"\w+(?:-\w+)*|[^\w\s]")
+_nlp = None          # (tokenize, stem) once loaded
+_nlp_lock = threading.Lock()
+
+def simple_tokenize(text: str):
+    """Pure-Python tokenizer: words (keeping inner hyphens) and punctuation marks."""
+    return _SIMPLE_TOKEN_RE.findall(text)
+
+def load_nlp():
+    """
+    Import NLTK and build (tokenize, stem) on first use.
+    If the ‘punkt’ model is missing and can’t be downloaded, falls back to
+    simple_tokenize. The Porter stemmer itself needs no NLTK data.
+    """
+    global _nlp
+    if _nlp is not None:
+        return _nlp
+    with _nlp_lock:
+        if _nlp is not None:
+            return _nlp
+        import nltk
+        from nltk.stem.porter import PorterStemmer
+
+        tokenize = simple_tokenize
+        if TOKENIZER == "nltk":
+            try:
+                nltk.word_tokenize("warm up")   # raises LookupError without punkt
+                tokenize = nltk.word_tokenize
+            except LookupError:
+                print("NLTK ‘punkt’ not found. Downloading…")
+                if nltk.download('punkt') and nltk.download('punkt_tab'):
+                    tokenize = nltk.word_tokenize
+                else:
+                    print("Could not download ‘punkt’; using the built-in tokenizer.")
+        stem = functools.lru_cache(maxsize=STEM_CACHE_SIZE)(PorterStemmer().stem)
+        _nlp = (tokenize, stem)
+        return _nlp
 
 def normalize_query(q: str):
     """
@@ -67,51 +127,253 @@ def normalize_query(q: str):
       - “sustainable”, “sustainability”, “eco-friendly” → stems to “sustain”, “ecofriendl”
       - “trending”, “trend”, “upward” → stems accordingly
     """
-    tokens = word_tokenize(q.lower())
-    stems = [stemmer.stem(tok) for tok in tokens]
+    tokenize, stem = load_nlp()
+    with metrics.time("tokenize"):
+        tokens = tokenize(q.lower())
+    with metrics.time("stem"):
+        stems = [stem(tok) for tok in tokens]
     return stems
 
-# 3. CoinGecko ID mapping for each coin we track
-#   (CoinGecko uses lowercase IDs, e.g. "bitcoin", "ethereum", "cardano")
-COIN_ID_MAP = {
-    "Bitcoin": "bitcoin",
-    "Ethereum": "ethereum",
-    "Cardano": "cardano",
-    "Polkadot": "polkadot"
-}
-
-# 4. Hard-coded sustainability data (energy_use + sustainability_score out of 10)
-#    Since CoinGecko does not provide “energy_use” or “sustainability_score” directly,
-#    we keep a separate small dict for those attributes.
-SUSTAINABILITY_DB = {
-    "Bitcoin":    {"energy_use": "high",   "sustainability_score": 3.0 / 10},
-    "Ethereum":   {"energy_use": "medium", "sustainability_score": 6.0 / 10},
-    "Cardano":    {"energy_use": "low",    "sustainability_score": 8.0 / 10},
-    "Polkadot":   {"energy_use": "low",    "sustainability_score": 7.0 / 10}
+# 3. Coin universe, loaded from a local catalog (see coin_registry.py)
+#    Each entry has the CoinGecko id (lowercase, e.g. "bitcoin"), ticker symbol,
+#    aliases and our static sustainability data (energy_use + sustainability_score
+#    out of 1, since CoinGecko does not provide eco metrics). The registry keeps
+#    rankings precomputed, so recommendations don’t scan every coin.
+COIN_CATALOG_PATH = os.environ.get(
+    "CRYPTOBUDDY_COIN_CATALOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "coin_catalog.json"))
+coin_registry = CoinRegistry.load(COIN_CATALOG_PATH)
+
+# 4. Views kept in sync by the registry:
+#      COIN_ID_MAP       – {name: CoinGecko id}
+#      SUSTAINABILITY_DB – {name: {"energy_use": ..., "sustainability_score": ...}}
+COIN_ID_MAP = coin_registry.id_map
+SUSTAINABILITY_DB = coin_registry.sustainability_db
+
+#   Finds coin names, symbols and aliases (and typos of them) in a query
+coin_extractor = CoinEntityExtractor.from_coins(coin_registry.names(),
+                                                coin_registry.symbols(),
+                                                coin_registry.aliases())
+
+def register_coin(record: CoinRecord):
+    """Add (or update) one coin at runtime: registry rankings + entity extractor."""
+    global _registry_market_version, _market_columns
+    coin_registry.update_coin(record)
+    coin_extractor.add(record.name, names=[record.name] + list(record.aliases),
+                       symbols=[record.symbol] if record.symbol else ())
+    # Re-apply the current snapshot (and rebuild the columns) on the next query
+    with _registry_market_lock:
+        _registry_market_version = None
+        _market_columns = None
+    # Cached routes/replies may name (or miss) the coin, so start over
+    query_cache.clear()
+    response_cache.clear()
+    warm_static_replies()
+
+#   With NumPy installed and at least COLUMNAR_MIN_COINS coins, snapshot
+#   categorization runs on a columnar store (coin_columns.py); set
+#   USE_COLUMNAR_STORE to False to force the plain-Python path. Below the
+#   threshold the per-refresh saving (~0.5 ms at 1,000 coins, ~7 ms at 10,000,
+#   see benchmarks/columnar_bench.py) doesn’t repay importing NumPy.
+USE_COLUMNAR_STORE = HAS_NUMPY
+COLUMNAR_MIN_COINS = 5000
+
+# 5. Bulk market endpoint: how many ids go into one /coins/markets request
+#    (CoinGecko caps per_page at 250).
+MARKETS_CHUNK_SIZE = 250
+
+# 6. Shared CoinGecko client: pooled keep-alive session, timeouts, retry/backoff.
+#    Point COINGECKO_BASE_URL at a local stand-in server for testing (e.g.
+#    CRYPTOBUDDY_COINGECKO_URL=http://127.0.0.1:8001/api/v3, see fake_coingecko.py).
+#    Every request first takes a token from coingecko_rate_limiter, which is
+#    shared by all threads and sessions (free tier: roughly 30 calls/minute).
+COINGECKO_BASE_URL = os.environ.get("CRYPTOBUDDY_COINGECKO_URL", DEFAULT_BASE_URL)
+COINGECKO_RATE_PER_SEC = 0.5
+COINGECKO_BURST = 5
+coingecko_rate_limiter = TokenBucket(rate=COINGECKO_RATE_PER_SEC, burst=COINGECKO_BURST)
+coingecko = CoinGeckoClient(base_url=COINGECKO_BASE_URL,
+                            rate_limiter=coingecko_rate_limiter,
+                            metrics=metrics)
+#   Chat turns waiting for the first market snapshot share one in-flight
+#   refresh (single_flight.py, see get_market_snapshot); after that they only
+#   read snapshots. upstream_flight.collapsed counts the turns that joined
+#   another turn’s refresh.
+upstream_flight = SingleFlight()
+
+# 7. Concurrent fan-out for multi-coin lookups: at most FETCH_MAX_WORKERS upstream
+#    requests in flight, and a whole query gives up after FETCH_DEADLINE seconds.
+#    A request that couldn’t finish by then is not sent (nor its token taken).
+FETCH_MAX_WORKERS = 8
+FETCH_DEADLINE = 15.0
+#    A snapshot refresh instead gets a deadline derived from the rate limit (see
+#    markets_refresh_deadline): time for every chunk’s token, but at most
+#    SNAPSHOT_REFRESH_INTERVAL of waiting, plus FETCH_DEADLINE for the last page. A universe needing
+#    more chunks than that is covered over several refreshes, each starting
+#    with the chunks the previous one didn’t get.
+fetch_pool = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS,
+                                thread_name_prefix="coingecko-fetch")
+
+# 8. Background market snapshot: every SNAPSHOT_REFRESH_INTERVAL seconds all of
+#    COIN_ID_MAP is refreshed in one go; recommendations only read the snapshot.
+SNAPSHOT_REFRESH_INTERVAL = 30.0
+
+#   The latest snapshot is also kept on disk (see snapshot_store.py): a restarted
+#   process serves it right away (if at most SNAPSHOT_MAX_AGE seconds old) while
+#   it refreshes, and all processes sharing SNAPSHOT_DB_PATH refresh in turn
+#   instead of each polling CoinGecko. The default file lives in the user’s own
+#   cache directory (not the shared temp dir, where anyone could plant prices)
+#   and its name is keyed by the CoinGecko base URL and the coin catalog, so
+#   runs against a fake server or another universe never share it. Set
+#   CRYPTOBUDDY_SNAPSHOT_DB="" to disable.
+def snapshot_db_path(base_url: str) -> str:
+    """CRYPTOBUDDY_SNAPSHOT_DB, or a per-user cache file keyed by `base_url` + the catalog."""
+    if "CRYPTOBUDDY_SNAPSHOT_DB" in os.environ:
+        return os.environ["CRYPTOBUDDY_SNAPSHOT_DB"]
+    key = f"{base_url.rstrip('/')}|{os.path.abspath(COIN_CATALOG_PATH)}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_dir, "cryptobuddy", f"snapshot_{digest}.db")
+
+SNAPSHOT_DB_PATH = snapshot_db_path(COINGECKO_BASE_URL)
+SNAPSHOT_MAX_AGE = 3600.0
+#   With no snapshot yet, a failed fetch is not retried by chat turns for
+#   SNAPSHOT_RETRY_AFTER seconds (they answer “no market data” right away).
+SNAPSHOT_RETRY_AFTER = 10.0
+
+# 9. Reply cache (see response_cache.py). query_cache maps the raw query text
+#     to its route (intent, entities, stems), so repeated questions skip
+#     tokenizing and stemming; response_cache maps (intent, entities[, snapshot
+#     version]) to the finished reply. Entities are the coins of a comparison
+#     or the time window of a trend question. Replies of SNAPSHOT_INTENTS are rebuilt once per
+#     snapshot version; STATIC_INTENTS replies are pinned and always cached.
+QUERY_CACHE_MAX_ENTRIES = 4096
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+SNAPSHOT_INTENTS = {"trend", "compare"}
+STATIC_INTENTS = {"help", "list"}
+query_cache = ResponseCache(max_entries=QUERY_CACHE_MAX_ENTRIES)
+response_cache = ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+
+# 10. Price history (see price_history.py): every published snapshot adds one
+#     price tick per coin to rolling 1h / 24h / 7d / 30d windows, so trend
+#     questions about any window are answered from memory. A coin’s first tick
+#     is seeded from the 1h / 7d / 30d % changes that /coins/markets returns
+#     when asked (HISTORY_CHANGE_WINDOWS), at no extra request.
+HISTORY_CHANGE_WINDOWS = "1h,7d,30d"
+HISTORY_ANCHOR_FIELDS = {"1h": "price_change_1h", "24h": "price_change_24h",
+                         "7d": "price_change_7d", "30d": "price_change_30d"}
+#     Query stems that pick a trend window; without one, the 24h change is used
+TREND_WINDOW_STEMS = {
+    "hour": "1h", "hourli": "1h", "1h": "1h",
+    "week": "7d", "weekli": "7d", "7d": "7d",
+    "month": "30d", "monthli": "30d", "30d": "30d",
+    "long": "30d", "longterm": "30d", "long-term": "30d",
 }
+TREND_WINDOW_LABELS = {"1h": "hour", "24h": "24 hours", "7d": "7 days", "30d": "30 days"}
+#     A window is only quoted for coins whose history spans this much of it
+HISTORY_MIN_COVERAGE = 0.9
+HISTORY_TOO_SHORT = ("", None)
+price_history = PriceHistory()
 
 # ------------------------------------------------------------------------------
 #                                 HELPER FUNCTIONS
 # ------------------------------------------------------------------------------
 
-def fetch_from_coingecko(coin_id: str):
-    """
-    Fetch full coin data from CoinGecko (free, no API key needed).
-    Returns the parsed JSON (dict). If something fails, returns None.
-    """
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}"
-    try:
-        response = requests.get(url, params={"localization": "false",
-                                             "tickers": "false",
-                                             "market_data": "true",
-                                             "community_data": "false",
-                                             "developer_data": "false",
-                                             "sparkline": "false"})
-        data = response.json()
-        return data
-    except Exception as e:
-        print(f"Error fetching {coin_id} from CoinGecko: {e}")
-        return None
+def fetch_markets_page(coin_ids: tuple, deadline: float = None):
+    """One /coins/markets request (free, no API key needed)."""
+    return coingecko.markets(coin_ids, price_change_percentage=HISTORY_CHANGE_WINDOWS,
+                             deadline=deadline)
+
+def fan_out(fn, items, deadline: float = None):
+    """
+    Run fn(item) for every item on `fetch_pool` and wait at most `deadline`
+    seconds (FETCH_DEADLINE by default) for all of them.
+    Returns (results, errors, timed_out):
+      results   – {item: return value} for calls that finished in time
+      errors    – {item: exception} for calls that raised
+      timed_out – items still pending at the deadline (left to finish in the background)
+    """
+    if deadline is None:
+        deadline = FETCH_DEADLINE
+    futures = {fetch_pool.submit(fn, item): item for item in items}
+    done, pending = wait(futures, timeout=deadline)
+    results, errors = {}, {}
+    for future in done:
+        item = futures[future]
+        try:
+            results[item] = future.result()
+        except Exception as e:
+            errors[item] = e
+    for future in pending:
+        future.cancel()
+    return results, errors, [futures[f] for f in pending]
+
+_markets_resume_at = 0   # first chunk of the next rotating fetch
+
+def fetch_markets_from_coingecko(coin_ids, deadline: float = None, rotate: bool = False):
+    """
+    Fetch market fields for many coins with /coins/markets, one request per
+    MARKETS_CHUNK_SIZE ids instead of one full /coins/{id} document per coin.
+    Chunks are fetched concurrently (see fan_out) within `deadline` seconds.
+    Returns {coin_id: {"price_change_24h": ..., "market_cap_usd": ...}} for the
+    ids CoinGecko returned; chunks that fail or miss the deadline are left out.
+    With `rotate`, the next rotating call starts at the first chunk this one
+    missed, so the same tail of a large universe isn’t always the one left out.
+    If no chunk succeeds, a CoinGeckoError is raised.
+    """
+    global _markets_resume_at
+    if deadline is None:
+        deadline = FETCH_DEADLINE
+    coin_ids = list(coin_ids)
+    chunks = [tuple(coin_ids[start:start + MARKETS_CHUNK_SIZE])
+              for start in range(0, len(coin_ids), MARKETS_CHUNK_SIZE)]
+    first = _markets_resume_at % len(chunks) if rotate and chunks else 0
+    order = chunks[first:] + chunks[:first]
+    fetch_until = time.monotonic() + deadline
+    with metrics.time("fetch_markets"):
+        pages, errors, timed_out = fan_out(
+            lambda chunk: fetch_markets_page(chunk, deadline=fetch_until), order, deadline)
+    skipped = sum(isinstance(e, CoinGeckoDeadlineExceeded) for e in errors.values())
+    if timed_out or skipped:
+        metrics.incr("fetch_deadline_misses_total", len(timed_out) + skipped)
+    if rotate:
+        missed = next((i for i, chunk in enumerate(order) if chunk not in pages), None)
+        if missed is not None:
+            _markets_resume_at = (first + missed) % len(chunks)
+
+    result = {}
+    fetched_at = time.time()
+    for rows in pages.values():
+        result.update(parse_markets_rows(rows, fetched_at))
+    if chunks and not pages:
+        if errors:
+            raise next(iter(errors.values()))
+        raise CoinGeckoTimeout(f"No /coins/markets page arrived within the "
+                               f"{deadline:.1f}s deadline")
+    return result
+
+def parse_markets_rows(rows, fetched_at: float = None):
+    """
+    Keep only the fields build_coin_data needs from a /coins/markets response,
+    plus "fetched_at" (when this price was fetched; a snapshot carries coins
+    over from earlier refreshes with their own).
+    """
+    parsed = {}
+    if not isinstance(rows, list):
+        return parsed
+    for row in rows:
+        coin_id = row.get("id")
+        if not coin_id:
+            continue
+        parsed[coin_id] = {
+            "price_change_24h": row.get("price_change_percentage_24h") or 0.0,
+            "market_cap_usd": row.get("market_cap") or 0.0,
+            "current_price": row.get("current_price"),
+            "price_change_1h": row.get("price_change_percentage_1h_in_currency"),
+            "price_change_7d": row.get("price_change_percentage_7d_in_currency"),
+            "price_change_30d": row.get("price_change_percentage_30d_in_currency"),
+            "fetched_at": fetched_at,
+        }
+    return parsed
 
 def categorize_market_cap(market_cap_usd: float):
     """
@@ -143,32 +405,101 @@ def categorize_price_trend(pct_change_24h: float):
     else:
         return "stable"
 
-def get_coin_data(coin_name: str):
-    """
-    Combines real-time data from CoinGecko with our static sustainability DB.
-    Returns a dict with:
-      {
-        "price_trend":     "rising"/"stable"/"falling",
-        "market_cap":      "high"/"medium"/"low",
-        "energy_use":      <from SUSTAINABILITY_DB>,
-        "sustainability_score": <from SUSTAINABILITY_DB> (float out of 1),
-        "price_change_24h": <raw pct_change float>,
-        "market_cap_usd":   <raw USD float>
-      }
-    If any fetch fails, returns None.
-    """
-    coin_id = COIN_ID_MAP.get(coin_name)
-    if not coin_id:
-        return None
-
-    data = fetch_from_coingecko(coin_id)
-    if data is None or "market_data" not in data:
-        return None
-
-    md = data["market_data"]
-    # Extract 24h price change percentage (float) and raw market cap USD
-    pct_change_24h = md.get("price_change_percentage_24h", 0.0)
-    market_cap_usd = md.get("market_cap", {}).get("usd", 0.0)
+def markets_refresh_deadline(coin_count: int) -> float:
+    """
+    Seconds a refresh of `coin_count` coins may take: the wait for one rate
+    limiter token per chunk beyond the burst (at most SNAPSHOT_REFRESH_INTERVAL),
+    plus the FETCH_DEADLINE a single page gets.
+    """
+    chunks = -(-coin_count // MARKETS_CHUNK_SIZE)
+    token_wait = max(0, chunks - coingecko_rate_limiter.burst) / coingecko_rate_limiter.rate
+    return min(token_wait, SNAPSHOT_REFRESH_INTERVAL) + FETCH_DEADLINE
+
+def refresh_all_market_data():
+    """Fetch every tracked coin for a new snapshot."""
+    coin_ids = list(COIN_ID_MAP.values())
+    return fetch_markets_from_coingecko(coin_ids, deadline=markets_refresh_deadline(len(coin_ids)),
+                                        rotate=True)
+
+market_refresher = SnapshotRefresher(refresh_all_market_data,
+                                     interval=SNAPSHOT_REFRESH_INTERVAL,
+                                     store=SnapshotStore(SNAPSHOT_DB_PATH) if SNAPSHOT_DB_PATH else None,
+                                     max_age=SNAPSHOT_MAX_AGE,
+                                     retry_after=SNAPSHOT_RETRY_AFTER)
+
+def use_coingecko(base_url: str, persist: bool = True):
+    """
+    Point the client at another CoinGecko (e.g. a fake_coingecko.py server)
+    before market_refresher starts. The snapshot store follows the URL (see
+    snapshot_db_path), or is turned off with persist=False, so test prices
+    never reach the snapshot file of processes using the real API.
+    """
+    global SNAPSHOT_DB_PATH
+    coingecko.base_url = base_url.rstrip("/")
+    SNAPSHOT_DB_PATH = snapshot_db_path(coingecko.base_url) if persist else ""
+    market_refresher.set_store(SnapshotStore(SNAPSHOT_DB_PATH) if SNAPSHOT_DB_PATH else None)
+
+@market_refresher.subscribe
+def record_price_history(snapshot):
+    """
+    Feed the prices a new snapshot fetched into price_history, each at its
+    fetch time. Coins carried over from an earlier refresh keep their old
+    fetched_at and are skipped by price_history (no fake zero returns).
+    """
+    with metrics.time("price_history"):
+        for coin_id, market in snapshot.coins.items():
+            anchors = None
+            if coin_id not in price_history:
+                anchors = {window: market.get(field)
+                           for window, field in HISTORY_ANCHOR_FIELDS.items()}
+            price_history.record(coin_id, market.get("fetched_at") or snapshot.created_at,
+                                 market.get("current_price"), anchors=anchors)
+
+def get_market_snapshot():
+    """
+    Current MarketSnapshot (see market_snapshot.py). Refreshed in the background
+    once market_refresher is started – by chat_server.py / the CLI, or here,
+    the first time the snapshot is older than SNAPSHOT_REFRESH_INTERVAL – so
+    scripts and notebooks never keep their first snapshot forever. Only the
+    first call of a process with no recent snapshot on disk has to wait for
+    CoinGecko. Returns None if no data could be fetched at all.
+    Chat turns that arrive while that first snapshot is being built share its
+    fetch through upstream_flight (and are counted as collapsed).
+    """
+    snapshot = market_refresher.current()
+    if snapshot is not None:
+        market_refresher.start_if_stale(snapshot)
+        return snapshot
+    return upstream_flight.do(("snapshot",), market_refresher.get_or_refresh)
+
+def snapshot_coin_data(snapshot, coin_names):
+    """
+    {coin_name: data} for the coins found in `snapshot` (see build_coin_data).
+    Coins missing from it are left out.
+    """
+    result = {}
+    if snapshot is None:
+        return result
+    for coin in coin_names:
+        market = snapshot.get(COIN_ID_MAP.get(coin))
+        if market is not None:
+            result[coin] = build_coin_data(coin, market)
+    return result
+
+def describe_freshness(snapshot):
+    """
+    Short footer telling the user when the market data was fetched. Uses the
+    snapshot’s own timestamp (not “N s ago”) so cached replies stay correct,
+    with the date and time zone, so data from an earlier day can’t pass for
+    today’s.
+    """
+    fetched_at = time.strftime("%Y-%m-%d %H:%M:%S %Z", time.localtime(snapshot.created_at))
+    return f"(Market data #{snapshot.version}, updated {fetched_at}.)"
+
+def build_coin_data(coin_name: str, market: dict):
+    """Categorize raw market fields and merge them with SUSTAINABILITY_DB."""
+    pct_change_24h = market["price_change_24h"]
+    market_cap_usd = market["market_cap_usd"]
 
     # Categorize them
     price_trend = categorize_price_trend(pct_change_24h)
@@ -197,129 +528,321 @@ def recommend_most_sustainable():
     Among tracked coins, pick the one with highest sustainability_score (out of 1).
     Returns: (coin_name, score_out_of_10)
     """
-    best_coin = max(SUSTAINABILITY_DB.keys(),
-                    key=lambda c: SUSTAINABILITY_DB[c]["sustainability_score"])
+    best_coin = coin_registry.top_sustainable(1)[0]
     score_frac = SUSTAINABILITY_DB[best_coin]["sustainability_score"]
     score_10 = round(score_frac * 10)
     return best_coin, score_10
 
-def recommend_high_profit():
+_registry_market_version = None
+_registry_market_lock = threading.Lock()
+_market_columns = None   # ColumnarCoinStore, rebuilt when the coin universe changes
+
+def sync_registry_market(snapshot):
     """
-    Among tracked coins, fetch real-time data and pick those with:
+    Push a snapshot’s market categories into coin_registry (once per snapshot
+    version). Only coins whose category changed are re-ranked. With NumPy
+    (USE_COLUMNAR_STORE) and at least COLUMNAR_MIN_COINS coins, the whole
+    universe is categorized in a few vectorized operations and only the
+    changed rows are sent to the registry.
+    """
+    global _registry_market_version, _market_columns
+    if snapshot is None or snapshot.version == _registry_market_version:
+        return
+    with _registry_market_lock, metrics.time("registry_sync"):
+        if snapshot.version == _registry_market_version:
+            return
+        if USE_COLUMNAR_STORE and len(coin_registry) >= COLUMNAR_MIN_COINS:
+            if _market_columns is None:
+                _market_columns = ColumnarCoinStore.from_registry(coin_registry)
+            for row in _market_columns.load_markets(snapshot.coins):
+                coin_registry.update_market(_market_columns.names[row],
+                                            *_market_columns.category(row))
+        else:
+            for coin_id, market in snapshot.coins.items():
+                name = coin_registry.name_for_id(coin_id)
+                if name is not None:
+                    coin_registry.update_market(name,
+                                                categorize_price_trend(market["price_change_24h"]),
+                                                categorize_market_cap(market["market_cap_usd"]))
+        _registry_market_version = snapshot.version
+
+def recommend_high_profit(snapshot=None):
+    """
+    Among tracked coins, use the market snapshot to pick those with:
       price_trend == "rising" AND market_cap == "high".
     If multiple, return the one with the highest sustainability_score.
     Returns coin_name or None if none match.
     """
-    candidates = []
-    for coin in COIN_ID_MAP.keys():
-        info = get_coin_data(coin)
-        if info is None:
+    if snapshot is None:
+        snapshot = get_market_snapshot()
+    sync_registry_market(snapshot)
+    best = coin_registry.top_in_category("rising", "high", 1)
+    return best[0] if best else None
+
+def trend_window(stems):
+    """The price-history window a trend question asks about ("1h", "7d", "30d"), or None."""
+    for stem in stems:
+        window = TREND_WINDOW_STEMS.get(stem)
+        if window is not None:
+            return window
+    return None
+
+def recommend_high_profit_over(window: str, snapshot=None):
+    """
+    recommend_high_profit, but “rising” is judged on the price history over
+    `window` instead of the 24h change. Only coins whose history covers at
+    least HISTORY_MIN_COVERAGE of the window count. Returns (coin_name, stats),
+    None if no covered coin is rising, or HISTORY_TOO_SHORT if no high-cap
+    coin’s history covers the window at all; stats as in PriceHistory.stats.
+    """
+    if snapshot is None:
+        snapshot = get_market_snapshot()
+    sync_registry_market(snapshot)
+    covered = False
+    for coin in coin_registry.in_market_cap("high"):
+        stats = price_history.stats(COIN_ID_MAP.get(coin), window)
+        if stats is None or stats["coverage"] < HISTORY_MIN_COVERAGE:
             continue
-        if info["price_trend"] == "rising" and info["market_cap"] == "high":
-            candidates.append(coin)
-
-    if not candidates:
-        return None
-
-    # Among candidates, pick the highest sustainability_score
-    best = max(candidates,
-               key=lambda c: SUSTAINABILITY_DB.get(c, {}).get("sustainability_score", 0.0))
-    return best
+        covered = True
+        if categorize_price_trend(stats["change_pct"]) == "rising":
+            return coin, stats
+    return None if covered else HISTORY_TOO_SHORT
 
 # ------------------------------------------------------------------------------
 #                           CHATBOT RESPONSE LOGIC
 # ------------------------------------------------------------------------------
 
+# Every intent is registered on `intent_router` with the stems/phrases that
+# trigger it; when several match, the one registered first wins. To add an
+# intent, decorate a new answer_* function instead of adding another `if`.
+# Handlers of SNAPSHOT_INTENTS also get the turn’s market snapshot (None when
+# no market data could be fetched) and must not fetch one themselves.
+intent_router = IntentRouter()
+
+def answer_no_market_data() -> str:
+    return (f"🤖 {BOT_NAME}: Sorry, I couldn’t fetch real-time market data right now. "
+            f"Please try again in a moment.")
+
+# 1. SUSTAINABILITY
+@intent_router.intent("sustainability", stems=["sustain", "eco", "green"])
+def answer_sustainability(user_query: str, stems) -> str:
+    coin, score10 = recommend_most_sustainable()
+    return (f"🤖 {BOT_NAME}: I recommend **{coin}** (sustainability score: {score10}/10). "
+            f"It’s eco-friendly and has long-term potential! 🍃")
+
+# 2. PROFITABILITY / TREND
+#    Time-window words alone (“best coin this week”) also ask for a trend, but
+#    only when no other intent matches (“compare X vs Y this week” is a compare)
+@intent_router.intent("trend", stems=["trend", "profit", "longterm", "long"],
+                      weak_stems=["hour", "hourli", "week", "weekli", "month", "monthli"])
+def answer_trend(user_query: str, stems, snapshot=None) -> str:
+    if snapshot is None:
+        return answer_no_market_data()
+    window = trend_window(stems)
+    if window is not None and len(price_history):
+        return answer_trend_over(window, snapshot)
+    best_coin = recommend_high_profit(snapshot)
+    if best_coin:
+        data = snapshot_coin_data(snapshot, [best_coin])[best_coin]
+        # Round price_change_24h & format market cap
+        pct = round(data["price_change_24h"], 2)
+        mc_usd = data["market_cap_usd"]
+        mc_cat = data["market_cap"]
+        sust10 = round(data["sustainability_score"] * 10)
+        return (f"🤖 {BOT_NAME}: **{best_coin}** is trending **{data['price_trend']}** "
+                f"(24h change: {pct}%) with a **{mc_cat}** market cap "
+                f"(≈ ${mc_usd:,.0f}). Its sustainability_score is {sust10}/10—win-win! 🚀\n"
+                f"{describe_freshness(snapshot)}")
+    else:
+        return (f"🤖 {BOT_NAME}: I don’t see any coin that’s both ‘rising’ and ‘high’ market cap right now. "
+                f"Maybe consider checking again later?")
+
+def answer_trend_over(window: str, snapshot) -> str:
+    """Trend answer for a 1h / 7d / 30d question, from price_history."""
+    label = TREND_WINDOW_LABELS[window]
+    best = recommend_high_profit_over(window, snapshot)
+    if best is HISTORY_TOO_SHORT:
+        return (f"🤖 {BOT_NAME}: I don’t have a full {label} of price history yet, so I can’t "
+                f"say what’s rising over that period. Try ‘Which crypto is trending up?’ "
+                f"for the last 24 hours.")
+    if best is None:
+        return (f"🤖 {BOT_NAME}: I don’t see any coin that’s both ‘rising’ over the last {label} "
+                f"and ‘high’ market cap right now. Maybe consider checking again later?")
+    coin, stats = best
+    pct = round(stats["change_pct"], 2)
+    sust10 = round(SUSTAINABILITY_DB.get(coin, {}).get("sustainability_score", 0.0) * 10)
+    # A window seeded from CoinGecko’s % change has just two points at first:
+    # their mean isn’t a moving average worth quoting
+    details = []
+    if stats["points"] >= 3:
+        details.append(f"{stats['points']}-point moving average ≈ ${stats['moving_average']:,.2f}")
+    if stats["volatility_pct"] is not None:
+        details.append(f"volatility {stats['volatility_pct']:.2f}%")
+    details = f" ({', '.join(details)})" if details else ""
+    return (f"🤖 {BOT_NAME}: Over the last {label}, **{coin}** is up **{pct}%** with a "
+            f"**high** market cap{details}. Its sustainability_score is {sust10}/10—win-win! 🚀\n"
+            f"{describe_freshness(snapshot)}")
+
+# 3. COMPARE two coins
+#    Look for “vs” or “compare” in stems
+@intent_router.intent("compare", stems=["vs", "compar"])
+def answer_compare(user_query: str, stems, snapshot=None) -> str:
+    # Find the coins mentioned (names, symbols, aliases; typos only if needed)
+    found = coin_extractor.extract(user_query, min_exact=2)
+    if len(found) >= 2:
+        c1, c2 = found[0], found[1]
+        if snapshot is None:
+            return answer_no_market_data()
+        both = snapshot_coin_data(snapshot, [c1, c2])
+        d1 = both.get(c1)
+        d2 = both.get(c2)
+        if d1 is None or d2 is None:
+            return f"🤖 {BOT_NAME}: Sorry, I couldn’t fetch real-time data for one of those coins."
+
+        # Format each coin’s stats
+        pct1 = round(d1["price_change_24h"], 2)
+        pct2 = round(d2["price_change_24h"], 2)
+        mc1 = d1["market_cap"]
+        mc2 = d2["market_cap"]
+        sust1 = round(d1["sustainability_score"] * 10)
+        sust2 = round(d2["sustainability_score"] * 10)
+
+        resp = (f"🤖 {BOT_NAME}: Here’s a quick comparison:\n"
+                f"- {c1}: price_trend={d1['price_trend']} (24h change: {pct1}%), "
+                f"market_cap={mc1}, sustainability={sust1}/10.\n"
+                f"- {c2}: price_trend={d2['price_trend']} (24h change: {pct2}%), "
+                f"market_cap={mc2}, sustainability={sust2}/10.\n")
+        # Simple “tie-breaker” on sustainability if both rising
+        if d1["price_trend"] == "rising" and d2["price_trend"] == "rising":
+            better = c1 if d1["sustainability_score"] > d2["sustainability_score"] else c2
+            resp += f"👉🏻 Both are rising, but {better} has a higher sustainability score!\n"
+        resp += describe_freshness(snapshot)
+        return resp
+    else:
+        return f"🤖 {BOT_NAME}: I need two valid coin names to compare (e.g., ‘Compare Bitcoin vs Cardano’)."
+
+# 4. LIST ALL COINS
+@intent_router.intent("list", stems=["list", "show"])
+def answer_list(user_query: str, stems) -> str:
+    names = ", ".join(COIN_ID_MAP.keys())
+    return f"🤖 {BOT_NAME}: Currently I track: {names}."
+
+# 5. HELP / COMMANDS
+@intent_router.intent("help", stems=["help", "command"])
+def answer_help(user_query: str, stems) -> str:
+    return (
+        f"🤖 {BOT_NAME} Help:\n"
+        f"- Ask 'Which crypto is trending up?' or 'What’s the most sustainable coin?'\n"
+        f"- Ask 'Which coin is trending up this week?' (also: last hour, this month)\n"
+        f"- Ask 'Compare Bitcoin vs Cardano'\n"
+        f"- Ask 'List all coins' to see all options\n"
+        f"- Type 'exit' or 'quit' to leave\n"
+    )
+
+# 6. FALLBACK
+@intent_router.set_fallback
+def answer_fallback(user_query: str, stems) -> str:
+    return (f"🤖 {BOT_NAME}: I’m not quite sure what you mean. Try:\n"
+            f"- 'Which crypto is trending up?'\n"
+            f"- 'Most sustainable coin?'\n"
+            f"- 'Compare Ethereum vs Cardano'\n"
+            f"- 'List all coins'\n"
+            f"- 'Help'\n")
+
 def chatbot_response(user_query: str) -> str:
     """
-    Use simple stems (NLP) to match keywords to tasks:
+    Use simple stems (NLP) to match keywords to tasks (see intent_router):
       - “sustain” / “eco” → recommend most sustainable coin
       - “trend” / “profit” / “long-term” → recommend high-profit coin
       - “compare” or “vs” → compare two coins’ real-time stats
       - “list” / “show” → list all tracked coins
       - “help” / “commands” → show help menu
     """
-    stems = normalize_query(user_query)
-
-    # 1. SUSTAINABILITY
-    if "sustain" in stems or "eco" in stems or "green" in stems:
-        coin, score10 = recommend_most_sustainable()
-        return (f"🤖 {BOT_NAME}: I recommend **{coin}** (sustainability score: {score10}/10). "
-                f"It’s eco-friendly and has long-term potential! 🍃")
-
-    # 2. PROFITABILITY / TREND
-    if "trend" in stems or "profit" in stems or "longterm" in stems or "long" in stems:
-        best_coin = recommend_high_profit()
-        if best_coin:
-            data = get_coin_data(best_coin)
-            # Round price_change_24h & format market cap
-            pct = round(data["price_change_24h"], 2)
-            mc_usd = data["market_cap_usd"]
-            mc_cat = data["market_cap"]
-            sust10 = round(data["sustainability_score"] * 10)
-            return (f"🤖 {BOT_NAME}: **{best_coin}** is trending **{data['price_trend']}** "
-                    f"(24h change: {pct}%) with a **{mc_cat}** market cap "
-                    f"(≈ ${mc_usd:,.0f}). Its sustainability_score is {sust10}/10—win-win! 🚀")
+    return answer_query(user_query)[1]
+
+def answer_query(user_query: str):
+    """chatbot_response, but returns (intent name, reply) — used by batch_chat.py."""
+    if not metrics.enabled:
+        return _answer_query(user_query)
+    start = time.perf_counter()
+    with metrics.profiled():
+        intent, reply = _answer_query(user_query)
+    metrics.observe("response", time.perf_counter() - start, intent=intent)
+    metrics.incr("responses_total", intent=intent)
+    return intent, reply
+
+def _answer_query(user_query: str):
+    text = " ".join(user_query.split())
+    if text.lower() == "stats":
+        # Hidden command: current metrics (not listed in help, never cached)
+        return "stats", f"🤖 {BOT_NAME} stats:\n{metrics.summary()}"
+    route = query_cache.get(text)
+    if route is None:
+        stems = normalize_query(text)
+        with metrics.time("route"):
+            intent, _ = intent_router.route(stems)
+        entities = ()
+        if intent == "compare":
+            with metrics.time("extract_coins"):
+                entities = tuple(coin_extractor.extract(text, min_exact=2))
+        elif intent == "trend":
+            entities = (trend_window(stems),)
+        route = query_cache.put(text, (intent, entities, tuple(stems)))
+    intent, entities, stems = route
+
+    version = None
+    handler = intent_router.handler_for(intent)
+    if intent in SNAPSHOT_INTENTS:
+        with metrics.time("snapshot_wait"):
+            snapshot = get_market_snapshot()
+        if snapshot is None:
+            # No market data at all: nothing worth caching
+            return intent, handler(text, list(stems), snapshot=None)
+        version = snapshot.version
+        handler = functools.partial(handler, snapshot=snapshot)
+    key = (intent, entities, version)
+    reply = response_cache.get(key)
+    if reply is None:
+        with metrics.time("handler", intent=intent):
+            reply = handler(text, list(stems))
+        if intent in STATIC_INTENTS:
+            response_cache.pin(key, reply)
         else:
-            return (f"🤖 {BOT_NAME}: I don’t see any coin that’s both ‘rising’ and ‘high’ market cap right now. "
-                    f"Maybe consider checking again later?")
-
-    # 3. COMPARE two coins
-    #    Look for “vs” or “compare” in stems
-    if "vs" in stems or "compar" in stems:
-        # Basic logic: find any two valid coin names in the user_query (case-insensitive)
-        found = [coin for coin in COIN_ID_MAP.keys()
-                 if coin.lower() in user_query.lower()]
-        if len(found) >= 2:
-            c1, c2 = found[0], found[1]
-            d1 = get_coin_data(c1)
-            d2 = get_coin_data(c2)
-            if d1 is None or d2 is None:
-                return f"🤖 {BOT_NAME}: Sorry, I couldn’t fetch real-time data for one of those coins."
-
-            # Format each coin’s stats
-            pct1 = round(d1["price_change_24h"], 2)
-            pct2 = round(d2["price_change_24h"], 2)
-            mc1 = d1["market_cap"]
-            mc2 = d2["market_cap"]
-            sust1 = round(d1["sustainability_score"] * 10)
-            sust2 = round(d2["sustainability_score"] * 10)
-
-            resp = (f"🤖 {BOT_NAME}: Here’s a quick comparison:\n"
-                    f"- {c1}: price_trend={d1['price_trend']} (24h change: {pct1}%), "
-                    f"market_cap={mc1}, sustainability={sust1}/10.\n"
-                    f"- {c2}: price_trend={d2['price_trend']} (24h change: {pct2}%), "
-                    f"market_cap={mc2}, sustainability={sust2}/10.\n")
-            # Simple “tie-breaker” on sustainability if both rising
-            if d1["price_trend"] == "rising" and d2["price_trend"] == "rising":
-                better = c1 if d1["sustainability_score"] > d2["sustainability_score"] else c2
-                resp += f"👉🏻 Both are rising, but {better} has a higher sustainability score!"
-            return resp
-        else:
-            return f"🤖 {BOT_NAME}: I need two valid coin names to compare (e.g., ‘Compare Bitcoin vs Cardano’)."
-
-    # 4. LIST ALL COINS
-    if "list" in stems or "show" in stems:
-        names = ", ".join(COIN_ID_MAP.keys())
-        return f"🤖 {BOT_NAME}: Currently I track: {names}."
-
-    # 5. HELP / COMMANDS
-    if "help" in stems or "command" in stems:
-        return (
-            f"🤖 {BOT_NAME} Help:\n"
-            f"- Ask 'Which crypto is trending up?' or 'What’s the most sustainable coin?'\n"
-            f"- Ask 'Compare Bitcoin vs Cardano'\n"
-            f"- Ask 'List all coins' to see all options\n"
-            f"- Type 'exit' or 'quit' to leave\n"
-        )
-
-    # 6. FALLBACK
-    return (f"🤖 {BOT_NAME}: I’m not quite sure what you mean. Try:\n"
-            f"- 'Which crypto is trending up?'\n"
-            f"- 'Most sustainable coin?'\n"
-            f"- 'Compare Ethereum vs Cardano'\n"
-            f"- 'List all coins'\n"
-            f"- 'Help'\n")
+            response_cache.put(key, reply, version=version)
+    return intent, reply
+
+def warm_static_replies():
+    """Render the STATIC_INTENTS replies up front so they are always cache hits."""
+    for intent in STATIC_INTENTS:
+        response_cache.pin((intent, (), None), intent_router.handler_for(intent)("", []))
+
+def response_cache_stats():
+    """Hit/miss counters of the route and reply caches."""
+    return {"queries": query_cache.stats(), "replies": response_cache.stats()}
+
+def _cache_and_snapshot_gauges():
+    snapshot = market_refresher.current()
+    gauges = {("snapshot_version", ()): snapshot.version if snapshot else 0,
+              ("snapshot_refreshes_total", ()): market_refresher.refresh_count,
+              ("snapshot_refresh_failures_total", ()): market_refresher.failure_count,
+              ("upstream_requests_sent_total", ()): coingecko.requests_sent,
+              ("upstream_collapsed_total", ()): upstream_flight.collapsed}
+    for cache_name, stats in response_cache_stats().items():
+        for field in ("hits", "misses"):
+            gauges[(f"{cache_name}_cache_{field}_total", ())] = stats[field]
+    limiter = coingecko_rate_limiter.stats()
+    gauges.update({("rate_limiter_acquired_total", ()): limiter["acquired"],
+                   ("rate_limiter_waits_total", ()): limiter["waits"],
+                   ("rate_limiter_wait_seconds_total", ()): limiter["total_wait_seconds"],
+                   ("rate_limiter_max_wait_seconds", ()): limiter["max_wait_seconds"],
+                   ("rate_limiter_rejected_total", ()): limiter["rejected"]})
+    return gauges
+
+metrics.add_gauges(_cache_and_snapshot_gauges)
+warm_static_replies()
+
+# How long importing this module took (see benchmarks/import_time.py)
+IMPORT_TIME_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
 
 # ------------------------------------------------------------------------------
 #                              MAIN CHATBOT LOOP
@@ -331,6 +854,7 @@ def greet_user():
 
 def run_chatbot():
     greet_user()
+    market_refresher.start()
     while True:
         try:
             user_input = input("You: ").strip()
@@ -339,8 +863,6 @@ def run_chatbot():
                 sys.exit(0)
             response = chatbot_response(user_input)
             print(response + "\n")
-            # Be polite with CoinGecko’s rate limits
-            time.sleep(0.5)
         except KeyboardInterrupt:
             print(f"\n{BOT_NAME}: Bye! Happy investing! 👋")
             sys.exit(0)
@@ -0,0 +1,165 @@
+# snapshot_store.py
+
+"""
+On-disk market snapshot for CryptoBuddy: warm restarts + cross-process sharing.
+
+The latest MarketSnapshot is kept in a small SQLite file (WAL mode, so readers
+never block the writer): one row holding the version, the fetch time and the
+coins as a compact JSON blob. Loading it is a single indexed read plus one
+json.loads, well under a millisecond for a few hundred coins.
+
+Several processes (chat-server workers, batch jobs) point at the same file.
+SnapshotRefresher takes the store’s exclusive file lock around every refresh
+and first re-reads the file: if another process published a fresh enough
+snapshot meanwhile, it adopts that one instead of calling CoinGecko, so the
+whole group polls upstream about once per refresh interval.
+
+  store = SnapshotStore(os.path.expanduser("~/.cache/cryptobuddy/snapshot.db"))
+  store.save(snapshot)
+  store.load()        → MarketSnapshot or None
+  with store.locked():
+      ...             # only one process at a time
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from market_snapshot import MarketSnapshot
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+def _check_owner(path: str):
+    """Raise PermissionError if `path` exists (even as a symlink) and isn’t ours."""
+    if not hasattr(os, "getuid"):  # pragma: no cover - Windows
+        return
+    try:
+        owner = os.lstat(path).st_uid
+    except FileNotFoundError:
+        return
+    if owner != os.getuid():
+        raise PermissionError(f"owned by uid {owner}, not by this user")
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    version     INTEGER PRIMARY KEY,
+    created_at  REAL NOT NULL,
+    coins       TEXT NOT NULL
+)
+"""
+
+
+class SnapshotStore:
+    """
+    Latest MarketSnapshot persisted at `path` (older versions are pruned).
+    Without fcntl (Windows) locked() only serializes threads of this process.
+
+    The file is only created on first use, in a directory only this user can
+    access (0700); a file or lock file already at `path` that belongs to
+    another user is refused, since whoever owns it controls the prices we
+    serve. The store is an optional cache: if the file can’t be created,
+    opened or trusted, it prints why once and from then on behaves as an
+    empty store (load() → None, save() does nothing).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._local = threading.local()        # one SQLite connection per thread
+        self._thread_lock = threading.Lock()
+        self._created = False
+        self.disabled = False
+        self.last_load_ms = None
+
+    def _connect(self):
+        """This thread’s connection, or None once the file turned out unusable."""
+        if self.disabled:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                if not self._created:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)),
+                                mode=0o700, exist_ok=True)
+                    _check_owner(self.path)
+                    _check_owner(self.lock_path)
+                conn = sqlite3.connect(self.path, timeout=5.0)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                if not self._created:
+                    with conn:
+                        conn.execute(_SCHEMA)
+                    self._created = True
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+                return None
+            self._local.conn = conn
+        return conn
+
+    def _disable(self, error):
+        if not self.disabled:
+            self.disabled = True
+            print(f"Market snapshot file {self.path} unusable ({error}); continuing without it.")
+
+    def load(self):
+        """The most recently saved snapshot, or None if the file is empty."""
+        started = time.perf_counter()
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT version, created_at, coins FROM snapshot "
+                "ORDER BY version DESC LIMIT 1").fetchone()
+        except sqlite3.Error as e:
+            print(f"Could not read the market snapshot file: {e}")
+            return None
+        if row is None:
+            return None
+        version, created_at, coins = row
+        snapshot = MarketSnapshot(version=version, created_at=created_at,
+                                  coins=json.loads(coins))
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+        return snapshot
+
+    def save(self, snapshot: MarketSnapshot):
+        """Persist `snapshot` and drop older versions."""
+        coins = json.dumps({coin_id: dict(fields) for coin_id, fields in snapshot.coins.items()},
+                           separators=(",", ":"))
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO snapshot (version, created_at, coins) "
+                             "VALUES (?, ?, ?)", (snapshot.version, snapshot.created_at, coins))
+                conn.execute("DELETE FROM snapshot WHERE version < ?", (snapshot.version,))
+        except sqlite3.Error as e:
+            print(f"Could not write the market snapshot file: {e}")
+
+    @contextmanager
+    def locked(self):
+        """Exclusive lock shared by every process using this snapshot file."""
+        with self._thread_lock:
+            lock_file = None
+            # _connect() first: it creates the directory and vets the lock file
+            if fcntl is not None and self._connect() is not None:
+                try:
+                    lock_file = open(self.lock_path, "a")
+                except OSError as e:
+                    self._disable(e)
+            if lock_file is None:
+                yield
+                return
+            with lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
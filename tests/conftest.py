@@ -0,0 +1,9 @@
+# tests/conftest.py
+
+"""Run the tests offline: repo root on sys.path, no NLTK data, no snapshot file."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CRYPTOBUDDY_TOKENIZER"] = "simple"
+os.environ["CRYPTOBUDDY_SNAPSHOT_DB"] = ""
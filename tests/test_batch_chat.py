@@ -0,0 +1,40 @@
+# tests/test_batch_chat.py
+
+import io
+import json
+
+import batch_chat
+from batch_chat import BatchRunner, InlineExecutor
+
+
+def fake_answer_chunk(texts):
+    return [("echo", f"reply to {text}", 0.0) for text in texts]
+
+
+def run(queries, **kwargs):
+    out = io.StringIO()
+    runner = BatchRunner(InlineExecutor(), out, **kwargs)
+    runner.run(json.dumps(query) + "\n" for query in queries)
+    return [json.loads(line) for line in out.getvalue().splitlines()], runner
+
+
+def test_evicted_answers_still_reach_pending_duplicates(monkeypatch):
+    monkeypatch.setattr(batch_chat, "answer_chunk", fake_answer_chunk)
+    queries = ["help", "list all coins", "hello", "help", "most sustainable"]
+
+    rows, runner = run(queries, chunk_size=1, window=1, dedupe_size=2)
+
+    assert [row["query"] for row in rows] == queries
+    assert all(row["reply"] == f"reply to {row['query']}" for row in rows)
+    assert [row["deduped"] for row in rows] == [False, False, False, True, False]
+    assert runner.stats() == {"lines": 5, "unique_queries": 4, "errors": 0}
+
+
+def test_duplicates_within_and_across_chunks_in_flight(monkeypatch):
+    monkeypatch.setattr(batch_chat, "answer_chunk", fake_answer_chunk)
+    queries = ["a", "a", "b", "a", "c", "b", "a"]
+
+    rows, runner = run(queries, chunk_size=2, window=3, dedupe_size=1)
+
+    assert [row["reply"] for row in rows] == [f"reply to {q}" for q in queries]
+    assert [row["deduped"] for row in rows] == [False, True, False, True, False, True, True]
@@ -0,0 +1,74 @@
+# tests/test_coin_entities.py
+
+import pytest
+
+from coin_entities import CoinEntityExtractor
+
+
+@pytest.fixture
+def extractor():
+    return CoinEntityExtractor.from_coins(
+        ["Bitcoin", "Ethereum", "Cardano", "Polkadot"],
+        symbols={"Bitcoin": "BTC", "Ethereum": "ETH", "Cardano": "ADA", "Polkadot": "DOT"},
+        aliases={"Ethereum": ["ether"]})
+
+
+@pytest.mark.parametrize("word", [
+    "other", "either", "others", "ethic", "there", "where", "rather", "father",
+    "cordon", "pocket", "bottom", "garden", "boiling", "polka", "card", "coin",
+    "bitter", "better", "hello", "about", "their",
+])
+def test_common_words_are_not_coins(extractor, word):
+    assert extractor.extract(f"Compare Bitcoin with the {word} coins") == ["Bitcoin"]
+
+
+@pytest.mark.parametrize("text, coins", [
+    ("compare bitcon vs etherium", ["Bitcoin", "Ethereum"]),
+    ("is cardono green?", ["Cardano"]),
+    ("polkadott price", ["Polkadot"]),
+    ("buy some ether", ["Ethereum"]),
+    ("$eth or BTC", ["Ethereum", "Bitcoin"]),
+])
+def test_typos_and_aliases_still_match(extractor, text, coins):
+    assert extractor.extract(text) == coins
+
+
+def test_compare_with_other_coins_needs_two_coins():
+    import smart_crypto
+
+    reply = smart_crypto.answer_compare("Compare Bitcoin with the other coins", [])
+    assert "I need two valid coin names" in reply
+
+
+def test_add_while_extracting_from_other_threads(extractor):
+    import sys
+    import threading
+
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            try:
+                extractor.extract("compare bitcoin vs zorbcoin1999 or ethereum")
+            except Exception as e:
+                errors.append(e)
+                return
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    try:
+        for thread in readers:
+            thread.start()
+        for i in range(2000):
+            extractor.add(f"Zorbcoin{i}", names=[f"zorbcoin{i}"], symbols=[f"ZB{i}"])
+    finally:
+        done.set()
+        for thread in readers:
+            thread.join()
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert extractor.extract("compare bitcoin vs zorbcoin1999 or ethereum") == [
+        "Bitcoin", "Zorbcoin1999", "Ethereum"]
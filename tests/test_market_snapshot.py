@@ -0,0 +1,50 @@
+# tests/test_market_snapshot.py
+
+import time
+
+import smart_crypto
+from market_snapshot import MarketSnapshot, SnapshotRefresher
+
+
+def make_refresher(age, fetched):
+    def fetch_all():
+        fetched.append(time.time())
+        return {"bitcoin": {"current_price": 2.0}}
+
+    refresher = SnapshotRefresher(fetch_all, interval=30)
+    refresher._publish(MarketSnapshot(1, time.time() - age, {"bitcoin": {"current_price": 1.0}}))
+    return refresher
+
+
+def test_stale_snapshot_starts_the_refresher(monkeypatch):
+    fetched = []
+    refresher = make_refresher(age=120, fetched=fetched)
+    monkeypatch.setattr(smart_crypto, "market_refresher", refresher)
+    try:
+        assert smart_crypto.get_market_snapshot().version == 1   # served, not waited on
+        deadline = time.monotonic() + 5
+        while refresher.current().version == 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert refresher.current().get("bitcoin")["current_price"] == 2.0
+        assert len(fetched) == 1
+    finally:
+        refresher.stop(timeout=5)
+
+
+def test_fresh_stopped_and_frozen_refreshers_do_not_start(monkeypatch):
+    fresh = make_refresher(age=1, fetched=[])
+    stopped = make_refresher(age=120, fetched=[])
+    stopped.stop()
+    frozen = SnapshotRefresher.frozen(MarketSnapshot(1, 0.0, {}))
+    for refresher in (fresh, stopped, frozen):
+        monkeypatch.setattr(smart_crypto, "market_refresher", refresher)
+        smart_crypto.get_market_snapshot()
+        assert refresher._thread is None
+
+
+def test_rate_limiter_stats_are_exported():
+    smart_crypto.coingecko_rate_limiter.acquire(timeout=0)
+    text = smart_crypto.metrics.prometheus()
+    for name in ("rate_limiter_acquired_total", "rate_limiter_waits_total",
+                 "rate_limiter_wait_seconds_total", "rate_limiter_max_wait_seconds"):
+        assert f"\ncryptobuddy_{name} " in text
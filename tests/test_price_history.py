@@ -0,0 +1,59 @@
+# tests/test_price_history.py
+
+import pytest
+
+from market_snapshot import MarketSnapshot
+from price_history import PriceHistory
+
+HOUR = 3600.0
+T0 = 1_700_000_000.0
+
+
+def test_anchor_covers_the_window_until_real_ticks_do():
+    history = PriceHistory(windows={"1h": HOUR})
+    history.record("bitcoin", T0, 110.0, anchors={"1h": 10.0})
+    for i in range(1, 6):
+        history.record("bitcoin", T0 + 30 * i, 110.0)
+
+    stats = history.stats("bitcoin", "1h")
+    # Still measured from (about) one hour back, not from the first real tick
+    assert stats["coverage"] == 1.0
+    assert stats["change_pct"] == pytest.approx(10.0, abs=0.5)
+    assert stats["volatility_pct"] is None or stats["volatility_pct"] < 1e-6
+
+
+def test_window_slides_once_real_ticks_cover_it():
+    history = PriceHistory(windows={"1h": HOUR})
+    history.record("bitcoin", T0, 100.0, anchors={"1h": 50.0})
+    # Two hours of ticks: flat for the first hour, then +1% over the second
+    for i in range(1, 121):
+        price = 100.0 if i <= 60 else 100.0 + (i - 60) / 60
+        history.record("bitcoin", T0 + 60 * i, price)
+
+    stats = history.stats("bitcoin", "1h")
+    assert stats["coverage"] == 1.0
+    assert stats["change_pct"] == pytest.approx(1.0, abs=0.1)
+
+
+def test_carried_over_prices_are_not_recorded_again(monkeypatch):
+    import smart_crypto
+
+    history = PriceHistory(windows={"1h": HOUR})
+    monkeypatch.setattr(smart_crypto, "price_history", history)
+
+    def snapshot(version, created_at, bitcoin_fetched_at, bitcoin_price):
+        return MarketSnapshot(version, created_at, {
+            "bitcoin": {"current_price": bitcoin_price, "fetched_at": bitcoin_fetched_at},
+            "cardano": {"current_price": 1.0 + version / 100, "fetched_at": created_at},
+        })
+
+    smart_crypto.record_price_history(snapshot(1, T0, T0, 100.0))
+    # Bitcoin’s chunk was not refreshed for two snapshots: its price is carried over
+    smart_crypto.record_price_history(snapshot(2, T0 + 600, T0, 100.0))
+    smart_crypto.record_price_history(snapshot(3, T0 + 1200, T0, 100.0))
+    smart_crypto.record_price_history(snapshot(4, T0 + 1800, T0 + 1800, 101.0))
+
+    window = history._series["bitcoin"]["1h"]
+    assert len(window) == 2                    # T0 and T0 + 1800 only
+    assert history.stats("bitcoin", "1h")["change_pct"] == pytest.approx(1.0)
+    assert len(history._series["cardano"]["1h"]) == 4
@@ -0,0 +1,37 @@
+# tests/test_snapshot_store.py
+
+import os
+import stat
+
+import pytest
+
+import smart_crypto
+from market_snapshot import MarketSnapshot
+from snapshot_store import SnapshotStore
+
+
+def test_default_path_is_in_the_users_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv("CRYPTOBUDDY_SNAPSHOT_DB")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    path = smart_crypto.snapshot_db_path("https://api.coingecko.com/api/v3")
+    assert os.path.dirname(path) == str(tmp_path / "cryptobuddy")
+
+    store = SnapshotStore(path)
+    store.save(MarketSnapshot(1, 1.0, {"bitcoin": {"current_price": 1.0}}))
+    assert stat.S_IMODE(os.stat(tmp_path / "cryptobuddy").st_mode) == 0o700
+    assert store.load().coins == {"bitcoin": {"current_price": 1.0}}
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid") or os.getuid() != 0,
+                    reason="needs root to create a file owned by another user")
+@pytest.mark.parametrize("planted", ["snapshot.db", "snapshot.db.lock"])
+def test_files_owned_by_another_user_are_refused(tmp_path, planted):
+    path = str(tmp_path / "snapshot.db")
+    SnapshotStore(path).save(MarketSnapshot(7, 1.0, {"bitcoin": {"current_price": 1e9}}))
+    open(tmp_path / planted, "a").close()
+    os.chown(tmp_path / planted, 65534, 65534)
+
+    store = SnapshotStore(path)
+    with store.locked():
+        assert store.load() is None
+    assert store.disabled